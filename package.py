@@ -1,5 +1,7 @@
 ''' Python Server publish script '''
 
+import gzip
+import hashlib
 import json
 import os
 import re
@@ -28,6 +30,47 @@ def _update(path, regex, value):
     content = re.sub(regex, repl, content)
     _write(path, content)
 
+_asset_types = [
+    '.html', '.js', '.css', '.png', '.gif', '.jpg', '.ico', '.json', '.pb',
+    '.ttf', '.otf', '.eot', '.woff', '.woff2', '.svg'
+]
+
+_compressed_types = [ '.html', '.js', '.css', '.json', '.svg', '.ttf', '.otf', '.eot' ]
+
+def _compress(path, content, entry):
+    ''' Write gzip and brotli siblings that are meaningfully smaller than the file '''
+    encodings = [ ('gzip', '.gz', lambda _: gzip.compress(_, 9, mtime=0)) ]
+    try:
+        import brotli # pylint: disable=import-outside-toplevel,import-error
+        encodings.append(('br', '.br', lambda _: brotli.compress(_, quality=11)))
+    except ImportError:
+        pass
+    for encoding, suffix, compress in encodings:
+        data = compress(content)
+        if len(data) < len(content) * 0.9:
+            with open(path + suffix, 'wb') as file:
+                file.write(data)
+            entry[encoding] = len(data)
+
+def _assets(folder):
+    ''' Write content hashes, gzip and brotli siblings and the asset manifest '''
+    manifest = {}
+    for directory, _, files in os.walk(folder):
+        for name in sorted(files):
+            path = os.path.join(directory, name)
+            key = os.path.relpath(path, folder).replace('\\', '/')
+            extension = os.path.splitext(name)[1]
+            # index.html is rewritten by the server and by the version step
+            if extension not in _asset_types or key == 'index.html':
+                continue
+            with open(path, 'rb') as file:
+                content = file.read()
+            entry = { 'hash': hashlib.sha256(content).hexdigest()[0:16] }
+            if extension in _compressed_types and len(content) > 1024:
+                _compress(path, content, entry)
+            manifest[key] = entry
+    _write(os.path.join(folder, 'assets.json'), json.dumps(manifest, indent=2))
+
 def _build():
     ''' Build dist/pypi '''
     shutil.rmtree(os.path.join(source_dir, '__pycache__'), ignore_errors=True)
@@ -36,6 +79,11 @@ def _build():
     shutil.copyfile(os.path.join(publish_dir, 'setup.py'), os.path.join(dist_pypi_dir, 'setup.py'))
     os.remove(os.path.join(dist_pypi_dir, 'netron', 'electron.js'))
     os.remove(os.path.join(dist_pypi_dir, 'netron', 'app.js'))
+    sys.path.insert(0, dist_pypi_dir)
+    __import__('netron.metadata').metadata.build(os.path.join(dist_pypi_dir, 'netron'))
+    sys.path.pop(0)
+    shutil.rmtree(os.path.join(dist_pypi_dir, 'netron', '__pycache__'), ignore_errors=True)
+    _assets(os.path.join(dist_pypi_dir, 'netron'))
 
 def _install():
     ''' Install dist/pypi '''
@@ -24,7 +24,7 @@ setuptools.setup(
     license="MIT",
     package_dir={ 'netron': 'netron' },
     packages=[ 'netron' ],
-    package_data={ 'netron': [ '*.*' ] },
+    package_data={ 'netron': [ '*.*', 'metadata/*' ] },
     exclude_package_data={ 'netron': [ 'app.js', 'electron.*' ] },
     install_requires=[],
     author='Lutz Roeder',
@@ -1,18 +1,28 @@
 ''' Python Server entry point '''
 
-import argparse
 import sys
 import os
 
-from .server import start
-from .server import stop
-from .server import status
-from .server import wait
-from .server import serve
-from .server import __version__
+_exports = {
+    'start': 'server', 'stop': 'control', 'status': 'control', 'ready': 'control',
+    'wait': 'server', 'serve': 'server', '__version__': 'server'
+}
+
+def __getattr__(name):
+    # The server and its http.server dependencies load on first use of the public API,
+    # while stop(), status() and ready() only need the lightweight control module.
+    if name in _exports:
+        import importlib # pylint: disable=import-outside-toplevel
+        return getattr(importlib.import_module('.' + _exports[name], __name__), name)
+    raise AttributeError("module '" + __name__ + "' has no attribute '" + name + "'")
+
+def __dir__():
+    return sorted(list(globals()) + list(_exports))
 
 def main():
     ''' main entry point '''
+    import argparse # pylint: disable=import-outside-toplevel
+    from .server import start, wait, __version__ # pylint: disable=import-outside-toplevel
     parser = argparse.ArgumentParser(
         description='Viewer for neural network, deep learning and machine learning models.')
     parser.add_argument('file',
@@ -24,6 +34,9 @@ def main():
         metavar='LEVEL', help='output verbosity (quiet, default, debug)',
         choices=[ 'quiet', 'default', 'debug', '0', '1', '2' ], default='default')
     parser.add_argument('--version', help="print version", action='store_true')
+    parser.add_argument('--warmup', metavar='TARGETS',
+        help='preload backends and assets in the background (all, or comma separated)',
+        nargs='?', const='all', default=None)
     args = parser.parse_args()
     if args.file and not os.path.exists(args.file):
         print("Model file '" + args.file + "' does not exist.")
@@ -32,7 +45,9 @@ def main():
         print(__version__)
         sys.exit(0)
     address = (args.host, args.port) if args.host else args.port if args.port else None
-    start(args.file, address=address, browse=args.browse, verbosity=args.verbosity)
+    warmup = args.warmup == 'all' or args.warmup.split(',') if args.warmup else None
+    start(args.file, address=address, browse=args.browse, verbosity=args.verbosity,
+        warmup=warmup)
     wait()
     sys.exit(0)
 
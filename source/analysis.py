@@ -0,0 +1,354 @@
+''' Analysis passes over serialized JSON graphs '''
+
+import collections
+import functools
+import threading
+
+_data_type_size = {
+    'boolean': 1, 'bool': 1, 'int8': 1, 'uint8': 1, 'qint8': 1, 'quint8': 1,
+    'float8e4m3fn': 1, 'float8e4m3fnuz': 1, 'float8e5m2': 1, 'float8e5m2fnuz': 1,
+    'int16': 2, 'uint16': 2, 'float16': 2, 'bfloat16': 2,
+    'int32': 4, 'uint32': 4, 'float32': 4, 'qint32': 4,
+    'int64': 8, 'uint64': 8, 'float64': 8, 'complex64': 8, 'complex128': 16
+}
+
+class Subgraphs:
+    ''' Subgraphs registered by key and serialized by callback on first request '''
+
+    def __init__(self):
+        self.entries = []
+        self.types = {}
+        self.values = {}
+        self.lock = threading.RLock()
+
+    def add(self, key, name, callback): # pylint: disable=missing-function-docstring
+        with self.lock:
+            if key is not None and key in self.types:
+                return self.types[key]
+            index = len(self.entries)
+            self.entries.append((name, callback))
+            if key is not None:
+                self.types[key] = index
+            return index
+
+    def to_json(self, index): # pylint: disable=missing-function-docstring
+        with self.lock:
+            if index not in self.values:
+                if index < 0 or index >= len(self.entries):
+                    return None
+                name, callback = self.entries[index]
+                json_graph = callback()
+                json_graph['name'] = name
+                self.values[index] = json_graph
+            return self.values[index]
+
+def size(json_argument):
+    ''' Size in bytes of a serialized argument or -1 if unknown '''
+    json_type = json_argument.get('type')
+    if not json_type or json_type.get('dataType') not in _data_type_size:
+        return -1
+    dimensions = json_type.get('shape', {}).get('dimensions')
+    if dimensions is None:
+        return -1
+    result = _data_type_size[json_type['dataType']]
+    for dimension in dimensions:
+        if not isinstance(dimension, int) or dimension < 0:
+            return -1
+        result *= dimension
+    return result
+
+def metadata(json_node, name, value):
+    ''' Append a metadata entry to a serialized node '''
+    json_node.setdefault('metadata', []).append({ 'name': name, 'value': value })
+
+def node(type_name, schema, name):
+    ''' Serialized node with the category from its operator schema and no arguments yet '''
+    category = schema['category'] if schema and 'category' in schema else ''
+    return {
+        'type': { 'name': type_name, 'category': category },
+        'name': name,
+        'inputs': [],
+        'outputs': [],
+        'attributes': []
+    }
+
+def statistics(json_tensor, value):
+    ''' Add value statistics of a numeric numpy array to a serialized tensor '''
+    import numpy # pylint: disable=import-outside-toplevel,import-error
+    value = value.astype(numpy.float64)
+    json_tensor['min'] = float(value.min())
+    json_tensor['max'] = float(value.max())
+    json_tensor['mean'] = float(value.mean())
+    json_tensor['std'] = float(value.std())
+    json_tensor['sparsity'] = float((value == 0).mean())
+    return json_tensor
+
+def tensor_statistics(tensor, limit=1048576):
+    ''' Size and value statistics of a PyTorch tensor, sampled above limit elements '''
+    import torch # pylint: disable=import-outside-toplevel,import-error
+    value = tensor.detach()
+    json_tensor = { 'bytes': value.numel() * value.element_size() }
+    if value.numel() == 0 or value.device.type == 'meta' or value.is_complex() or \
+        value.layout != torch.strided: # pylint: disable=no-member
+        return json_tensor
+    if value.is_quantized:
+        value = value.dequantize()
+    if value.numel() > limit:
+        # Gather every n-th element by its coordinates, as flattening a
+        # non-contiguous tensor would copy all of it
+        step = -(-value.numel() // limit)
+        if value.is_contiguous():
+            value = value.view(-1)[::step]
+        else:
+            index = torch.arange(0, value.numel(), step, device=value.device) # pylint: disable=no-member
+            coordinates = []
+            for dimension in reversed(value.shape):
+                coordinates.insert(0, index % dimension)
+                index = index // dimension
+            value = value[tuple(coordinates)]
+        json_tensor['sampled'] = value.numel()
+    else:
+        value = value.reshape(-1)
+    value = value.to(torch.float64 if value.dtype == torch.float64 else torch.float32) # pylint: disable=no-member
+    minimum, maximum = torch.aminmax(value) # pylint: disable=no-member
+    zeros = value.numel() - torch.count_nonzero(value) # pylint: disable=no-member
+    values = torch.stack([ # pylint: disable=no-member
+        minimum, maximum, value.mean(), value.std(correction=0), zeros / value.numel()
+    ]).tolist()
+    for name, item in zip([ 'min', 'max', 'mean', 'std', 'sparsity' ], values):
+        json_tensor[name] = item
+    return json_tensor
+
+def _arguments(parameters):
+    return [ index for parameter in parameters for index in parameter['arguments'] ]
+
+def schedule(json_graph):
+    ''' Topological execution order of nodes, stable with respect to node order '''
+    json_nodes = json_graph['nodes']
+    producers = {}
+    for i, json_node in enumerate(json_nodes):
+        for index in _arguments(json_node['outputs']):
+            producers[index] = i
+    consumers = [ [] for _ in json_nodes ]
+    degrees = [ 0 ] * len(json_nodes)
+    for i, json_node in enumerate(json_nodes):
+        for producer in set(producers.get(_, -1) for _ in _arguments(json_node['inputs'])):
+            if producer not in (-1, i):
+                consumers[producer].append(i)
+                degrees[i] += 1
+    queue = collections.deque(i for i, degree in enumerate(degrees) if degree == 0)
+    order = []
+    while queue:
+        i = queue.popleft()
+        order.append(i)
+        for consumer in consumers[i]:
+            degrees[consumer] -= 1
+            if degrees[consumer] == 0:
+                queue.append(consumer)
+    if len(order) != len(json_nodes):
+        scheduled = set(order)
+        order.extend(i for i in range(len(json_nodes)) if i not in scheduled)
+    return order
+
+def memory(json_graph): # pylint: disable=too-many-locals
+    ''' Annotate nodes with live activation memory and return the peak '''
+    json_nodes = json_graph['nodes']
+    json_arguments = json_graph['arguments']
+    order = schedule(json_graph)
+    count = len(order)
+    sizes = [ -1 if 'initializer' in _ else size(_) for _ in json_arguments ]
+    starts = [ -1 ] * len(json_arguments)
+    ends = [ -1 ] * len(json_arguments)
+    for index in _arguments(json_graph['inputs']):
+        starts[index] = 0
+        ends[index] = 0
+    for step, i in enumerate(order):
+        json_node = json_nodes[i]
+        for index in _arguments(json_node['inputs']):
+            ends[index] = max(ends[index], step)
+        for index in _arguments(json_node['outputs']):
+            if starts[index] == -1:
+                starts[index] = step
+                ends[index] = max(ends[index], step)
+    for index in _arguments(json_graph['outputs']):
+        ends[index] = count - 1
+    deltas = [ 0 ] * (count + 1)
+    for index, value in enumerate(sizes):
+        if value > 0 and starts[index] != -1:
+            deltas[starts[index]] += value
+            deltas[ends[index] + 1] -= value
+    live = [ 0 ] * count
+    current = 0
+    for step in range(count):
+        current += deltas[step]
+        live[step] = current
+    peak = max(live) if count > 0 else 0
+    for step, i in enumerate(order):
+        json_node = json_nodes[i]
+        metadata(json_node, 'schedule', step)
+        metadata(json_node, 'live_bytes', live[step])
+        if peak and live[step] == peak:
+            metadata(json_node, 'peak_memory', True)
+    return [ { 'name': 'peak_activation_bytes', 'value': peak } ]
+
+class _Group: # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    def __init__(self, path):
+        self.path = path
+        self.groups = {}
+        self.items = []
+        self.inputs = []
+        self.outputs = []
+        self.nodes = 0
+        self.parameters = set()
+        self.flops = None
+
+def _tree(paths):
+    groups = { (): _Group(()) }
+    for i, path in enumerate(paths):
+        for depth in range(1, len(path) + 1):
+            if path[:depth] not in groups:
+                parent = groups[path[:depth - 1]]
+                child = _Group(path[:depth])
+                groups[child.path] = child
+                parent.groups[path[depth - 1]] = child
+                parent.items.append(child)
+        groups[path].items.append(i)
+    return groups
+
+def _connect(groups, boundaries, index, source, target):
+    ''' Register a value crossing from the source to the target scope as group output and input '''
+    common = 0
+    while common < min(len(source), len(target)) and source[common] == target[common]:
+        common += 1
+    for depth in range(common + 1, len(source) + 1):
+        if (source[:depth], index, False) not in boundaries:
+            boundaries.add((source[:depth], index, False))
+            groups[source[:depth]].outputs.append(index)
+    for depth in range(common + 1, len(target) + 1):
+        if (target[:depth], index, True) not in boundaries:
+            boundaries.add((target[:depth], index, True))
+            groups[target[:depth]].inputs.append(index)
+
+def _flops(json_node):
+    for entry in json_node.get('metadata', []):
+        if entry['name'] == 'flops' and isinstance(entry['value'], (int, float)):
+            return entry['value']
+    return None
+
+def _aggregate(json_graph, paths, groups):
+    ''' Accumulate node counts, parameters, FLOPs and boundary values per group '''
+    json_arguments = json_graph['arguments']
+    producers = {}
+    for index in _arguments(json_graph['inputs']):
+        producers[index] = ()
+    for i, json_node in enumerate(json_graph['nodes']):
+        for index in _arguments(json_node['outputs']):
+            producers[index] = paths[i]
+    boundaries = set()
+    for i, json_node in enumerate(json_graph['nodes']):
+        path = paths[i]
+        flops = _flops(json_node)
+        parameters = []
+        for index in _arguments(json_node['inputs']):
+            if 'initializer' in json_arguments[index]:
+                parameters.append(index)
+            elif index in producers:
+                _connect(groups, boundaries, index, producers[index], path)
+        for depth in range(1, len(path) + 1):
+            current = groups[path[:depth]]
+            current.nodes += 1
+            current.parameters.update(parameters)
+            if flops is not None:
+                current.flops = (current.flops or 0) + flops
+    for index in _arguments(json_graph['outputs']):
+        if index in producers:
+            _connect(groups, boundaries, index, producers[index], ())
+
+def _elements(json_argument):
+    result = 1
+    for dimension in json_argument.get('type', {}).get('shape', {}).get('dimensions', []):
+        if not isinstance(dimension, int):
+            return 0
+        result *= dimension
+    return result
+
+def _boundary(remap, name, indices):
+    return remap([ { 'name': name, 'arguments': indices } ]) if indices else []
+
+class _Serializer: # pylint: disable=too-few-public-methods
+    ''' Group subgraphs with their own argument tables, registered as lazy callbacks '''
+
+    def __init__(self, json_graph, root, label, register):
+        self.json_graph = json_graph
+        self.root = root
+        self.label = label
+        self.register = register
+
+    def serialize(self, current): # pylint: disable=missing-function-docstring
+        json_graph = self.json_graph
+        mapping = {}
+        arguments = []
+        def remap(parameters):
+            result = []
+            for parameter in parameters:
+                values = []
+                for index in parameter['arguments']:
+                    if index not in mapping:
+                        mapping[index] = len(arguments)
+                        arguments.append(json_graph['arguments'][index])
+                    values.append(mapping[index])
+                result.append(dict(parameter, arguments=values))
+            return result
+        nodes = []
+        for item in current.items:
+            if isinstance(item, int):
+                json_node = dict(json_graph['nodes'][item])
+                json_node['inputs'] = remap(json_node['inputs'])
+                json_node['outputs'] = remap(json_node['outputs'])
+            else:
+                json_node = self._group(item, remap)
+            nodes.append(json_node)
+        if current is self.root:
+            json_result = dict(json_graph)
+            json_result['inputs'] = remap(json_graph['inputs'])
+            json_result['outputs'] = remap(json_graph['outputs'])
+        else:
+            json_result = {
+                'inputs': _boundary(remap, 'input', current.inputs),
+                'outputs': _boundary(remap, 'output', current.outputs)
+            }
+        json_result['nodes'] = nodes
+        json_result['arguments'] = arguments
+        return json_result
+
+    def _group(self, item, remap):
+        name = item.path[-1]
+        index = self.register(None, name, functools.partial(self.serialize, item))
+        json_node = {
+            'type': { 'name': self.label(item.path), 'category': '' },
+            'name': name,
+            'inputs': _boundary(remap, 'input', item.inputs),
+            'outputs': _boundary(remap, 'output', item.outputs),
+            'attributes': [ {
+                'name': 'graph',
+                'type': 'graph',
+                'value': { 'name': name, 'reference': 'graphs/' + str(index) }
+            } ]
+        }
+        json_arguments = self.json_graph['arguments']
+        parameters = sum(_elements(json_arguments[_]) for _ in item.parameters)
+        metadata(json_node, 'nodes', item.nodes)
+        metadata(json_node, 'parameters', parameters)
+        if item.flops is not None:
+            metadata(json_node, 'flops', item.flops)
+        return json_node
+
+def group(json_graph, paths, label, register):
+    ''' Collapse nodes into nested group nodes following per-node scope paths.
+    Each group node references a subgraph through a lazily serialized callback.
+    '''
+    if not any(paths):
+        return json_graph
+    groups = _tree(paths)
+    _aggregate(json_graph, paths, groups)
+    return _Serializer(json_graph, groups[()], label, register).serialize(groups[()])
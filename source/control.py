@@ -0,0 +1,63 @@
+''' Model server lookup and control without the http.server dependencies '''
+
+import threading
+
+class ServerThread(threading.Thread):
+    ''' Base of the model server threads found by stop(), status() and ready() '''
+    address = None
+    warmup = None
+
+    def stop(self):
+        ''' Stop server '''
+
+    def alive(self):
+        ''' Check server status '''
+        return False
+
+def make_address(address):
+    ''' Normalize a port number or (host, port) tuple to a (host, port) address '''
+    if address is None or isinstance(address, int):
+        port = address
+        address = ('localhost', port)
+    if isinstance(address, tuple) and len(address) == 2:
+        host = address[0]
+        port = address[1]
+        if isinstance(host, str) and (port is None or isinstance(port, int)):
+            return address
+    raise ValueError('Invalid address.')
+
+def threads(address=None):
+    ''' Alive model server threads, optionally filtered by address '''
+    values = [ _ for _ in threading.enumerate() if isinstance(_, ServerThread) and _.alive() ]
+    if address is not None:
+        address = make_address(address)
+        values = [ _ for _ in values if address[0] == _.address[0] ]
+        if address[1]:
+            values = [ _ for _ in values if address[1] == _.address[1] ]
+    return values
+
+def stop(address=None):
+    '''Stop serving model at address.
+
+    Args:
+        address (tuple, optional): A (host, port) tuple, or a port number.
+    '''
+    for thread in threads(address):
+        thread.stop()
+
+def status(adrress=None):
+    '''Is model served at address.
+
+    Args:
+        address (tuple, optional): A (host, port) tuple, or a port number.
+    '''
+    return len(threads(adrress)) > 0
+
+def ready(address=None):
+    '''Has the background warm-up of the servers at address finished.
+
+    Args:
+        address (tuple, optional): A (host, port) tuple, or a port number.
+    '''
+    values = threads(address)
+    return len(values) > 0 and all(_.warmup is None or _.warmup.ready() for _ in values)
@@ -499,6 +499,13 @@ host.BrowserHost = class {
 
     _url(file) {
         file = file.startsWith('./') ? file.substring(2) : file.startsWith('/') ? file.substring(1) : file;
+        if (this._meta.assets && !this._assets) {
+            this._assets = new Map(this._meta.assets[0].split(' ').map((item) => item.split(':')));
+        }
+        if (this._assets && this._assets.has(file)) {
+            const index = file.lastIndexOf('.');
+            file = file.substring(0, index) + '.' + this._assets.get(file) + file.substring(index);
+        }
         const location = this.window.location;
         const pathname = location.pathname.endsWith('/') ?
             location.pathname :
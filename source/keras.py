@@ -0,0 +1,220 @@
+''' Keras model backend '''
+
+import os
+
+from . import analysis
+
+class ModelFactory: # pylint: disable=too-few-public-methods
+    ''' Keras backend model factory '''
+    def open(self, model): # pylint: disable=missing-function-docstring
+        return _Model(ModelFactory.metadata(), model)
+
+    @staticmethod
+    def metadata():
+        ''' Layer metadata shared by all models opened in this process '''
+        from . import metadata # pylint: disable=import-outside-toplevel
+        return metadata.Types.open(os.path.dirname(__file__), [ ('keras', '') ])
+
+class _Model:
+    def __init__(self, metadata, model):
+        self.metadata = metadata
+        self.value = model
+        self.subgraphs = analysis.Subgraphs()
+
+    def subgraph(self, index):
+        ''' Serialize nested model subgraph on first request '''
+        return self.subgraphs.to_json(index)
+
+    def to_json(self):
+        ''' Serialize model to JSON message '''
+        json_graph = _Graph(self, self.value).to_json()
+        parameters = 0
+        parameter_bytes = 0
+        for variable in getattr(self.value, 'weights', []):
+            json_type = _tensor_type(variable)
+            size = analysis.size({ 'type': json_type }) if json_type else -1
+            if size >= 0:
+                parameters += _elements(json_type)
+                parameter_bytes += size
+        json_metadata = [
+            { 'name': 'parameters', 'value': parameters },
+            { 'name': 'parameter_bytes', 'value': parameter_bytes }
+        ]
+        json_metadata.extend(analysis.memory(json_graph))
+        version = _version()
+        return {
+            'signature': 'netron:keras',
+            'format': 'Keras' + (' v' + version if version else ''),
+            'metadata': json_metadata,
+            'graphs': [ json_graph ]
+        }
+
+class _Graph: # pylint: disable=too-few-public-methods
+
+    def __init__(self, model, value):
+        self.model = model
+        self.metadata = model.metadata
+        self.value = value
+
+    def _nodes(self):
+        value = getattr(self.value, '_functional', None) or self.value
+        nodes_by_depth = getattr(value, '_nodes_by_depth', None)
+        if not nodes_by_depth:
+            return None
+        return [ node for depth in sorted(nodes_by_depth, reverse=True) \
+            for node in nodes_by_depth[depth] ]
+
+    def to_json(self): # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+        ''' Serialize layer graph, or the layer sequence of an unbuilt Sequential model '''
+        json_graph = { 'arguments': [], 'nodes': [], 'inputs': [], 'outputs': [] }
+        arguments = {}
+        def argument(tensor):
+            history = getattr(tensor, '_keras_history', None)
+            key = (history[0].name, history[1], history[2]) if history else id(tensor)
+            if key not in arguments:
+                name = str(key)
+                if history:
+                    name = key[0] if key[1:] == (0, 0) else ':'.join(str(_) for _ in key)
+                json_argument = { 'name': name }
+                json_type = _tensor_type(tensor)
+                if json_type:
+                    json_argument['type'] = json_type
+                arguments[key] = len(json_graph['arguments'])
+                json_graph['arguments'].append(json_argument)
+            return arguments[key]
+        def weight(variable):
+            json_argument = { 'name': _path(variable) }
+            json_type = _tensor_type(variable)
+            if json_type:
+                json_argument['type'] = json_type
+                size = analysis.size(json_argument)
+                if size >= 0:
+                    json_argument['initializer'] = { 'bytes': size }
+            json_graph['arguments'].append(json_argument)
+            return len(json_graph['arguments']) - 1
+
+        nodes = self._nodes()
+        if nodes is None:
+            nodes = [ (layer, [], []) for layer in getattr(self.value, 'layers', []) ]
+        else:
+            nodes = [ (
+                getattr(node, 'operation', None) or getattr(node, 'layer', None),
+                _flatten(getattr(node, 'input_tensors', [])),
+                _flatten(getattr(node, 'output_tensors', None) or getattr(node, 'outputs', []))
+            ) for node in nodes ]
+        seen = set()
+        for layer, inputs, outputs in nodes:
+            class_name = type(layer).__name__
+            if class_name == 'InputLayer':
+                for tensor in outputs:
+                    json_graph['inputs'].append({
+                        'name': layer.name,
+                        'arguments': [ argument(tensor) ]
+                    })
+                continue
+            schema = self.metadata.get(class_name, None)
+            json_node = {
+                'type': {
+                    'name': class_name,
+                    'category': schema['category'] if schema and 'category' in schema else ''
+                },
+                'name': layer.name,
+                'inputs': [],
+                'outputs': [],
+                'attributes': []
+            }
+            parameters = schema['inputs'] if schema and 'inputs' in schema else []
+            if inputs:
+                name = parameters[0]['name'] if len(parameters) > 0 else 'input'
+                json_node['inputs'].append({
+                    'name': name,
+                    'arguments': [ argument(_) for _ in inputs ]
+                })
+            if id(layer) not in seen and not hasattr(layer, 'layers'):
+                seen.add(id(layer))
+                for variable in layer.weights:
+                    json_node['inputs'].append({
+                        'name': _path(variable).split('/')[-1].split(':')[0],
+                        'arguments': [ weight(variable) ]
+                    })
+            if outputs:
+                json_node['outputs'].append({
+                    'name': 'output',
+                    'arguments': [ argument(_) for _ in outputs ]
+                })
+            for key, value in layer.get_config().items() if hasattr(layer, 'get_config') else []:
+                if key in ('name', 'layers', 'input_layers', 'output_layers'):
+                    continue
+                json_node['attributes'].append({ 'name': key, 'value': _value(value) })
+            if hasattr(layer, 'layers'):
+                index = self.model.subgraphs.add(id(layer), layer.name, self._callback(layer))
+                json_node['attributes'].append({
+                    'name': 'graph',
+                    'type': 'graph',
+                    'value': { 'name': layer.name, 'reference': 'graphs/' + str(index) }
+                })
+            json_graph['nodes'].append(json_node)
+
+        for tensor in _flatten(getattr(self.value, 'outputs', None) or []):
+            history = getattr(tensor, '_keras_history', None)
+            json_graph['outputs'].append({
+                'name': history[0].name if history else 'output',
+                'arguments': [ argument(tensor) ]
+            })
+        return json_graph
+
+    def _callback(self, layer):
+        def callback():
+            graph = _Graph(self.model, layer)
+            json_graph = graph.to_json()
+            analysis.memory(json_graph)
+            return json_graph
+        return callback
+
+def _version():
+    try:
+        import keras # pylint: disable=import-outside-toplevel,import-error
+        return keras.__version__
+    except ImportError:
+        return None
+
+def _path(variable):
+    return getattr(variable, 'path', None) or variable.name
+
+def _elements(json_type):
+    result = 1
+    for dimension in json_type['shape']['dimensions']:
+        result *= dimension
+    return result
+
+def _flatten(value):
+    if isinstance(value, (list, tuple)):
+        return [ item for _ in value for item in _flatten(_) ]
+    if isinstance(value, dict):
+        return [ item for _ in value.values() for item in _flatten(_) ]
+    return [ value ] if value is not None else []
+
+def _tensor_type(value):
+    shape = getattr(value, 'shape', None)
+    dtype = getattr(value, 'dtype', None)
+    if shape is None or dtype is None:
+        return None
+    data_type = getattr(dtype, 'name', str(dtype))
+    data_type = { 'bool': 'boolean' }.get(data_type, data_type)
+    if hasattr(shape, 'as_list'):
+        shape = shape.as_list() if shape.rank is not None else None
+    json_type = { 'dataType': data_type }
+    if shape is not None:
+        json_type['shape'] = { 'dimensions': [ _ if _ is not None else '?' for _ in shape ] }
+    return json_type
+
+def _value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [ _value(_) for _ in value ]
+    if isinstance(value, dict):
+        if 'class_name' in value:
+            return value['class_name']
+        return { key: _value(item) for key, item in value.items() }
+    return str(value)
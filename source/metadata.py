@@ -0,0 +1,197 @@
+''' Per-operator metadata shards '''
+
+import collections
+import json
+import os
+import threading
+
+def _items(file):
+    with open(file, 'r', encoding='utf-8') as handle:
+        data = json.load(handle)
+    if isinstance(data, dict):
+        return list(Index(file).items())
+    return data
+
+def _group(items):
+    types = collections.OrderedDict()
+    for item in items:
+        if isinstance(item, dict) and 'name' in item:
+            types.setdefault(item['name'], []).append(item)
+    return types
+
+def build(folder):
+    ''' Split each *-metadata.json into per-operator JSON arrays packed into one shards file,
+    with a manifest mapping operator names to byte ranges '''
+    target = os.path.join(folder, 'metadata')
+    os.makedirs(target, exist_ok=True)
+    for filename in sorted(os.listdir(folder)):
+        if not filename.endswith('-metadata.json'):
+            continue
+        framework = filename[:-len('-metadata.json')]
+        types = _group(_items(os.path.join(folder, filename)))
+        manifest = {}
+        offset = 0
+        with open(os.path.join(target, framework + '.shards'), 'wb') as handle:
+            for name, items in types.items():
+                content = json.dumps(items, separators=(',', ':'), ensure_ascii=False)
+                content = content.encode('utf-8')
+                handle.write(content)
+                manifest[name] = [ offset, len(content) ]
+                offset += len(content)
+        content = json.dumps({ 'types': manifest }, separators=(',', ':'), ensure_ascii=False)
+        with open(os.path.join(target, framework + '.json'), 'w', encoding='utf-8') as handle:
+            handle.write(content)
+
+class Index:
+    ''' onnx-metadata.json reader expanding version deltas per operator on first use '''
+
+    def __init__(self, file):
+        with open(file, 'r', encoding='utf-8') as handle:
+            data = json.load(handle)
+        self.strings = data['strings'] if isinstance(data, dict) else []
+        self.entries = data['types'] if isinstance(data, dict) else data
+        self.types = {}
+        for entry in self.entries:
+            self.types.setdefault(entry['name'], []).append(entry)
+        self.cache = {}
+
+    def type(self, name, version=None):
+        ''' Latest schema, or the schema in effect at the given opset version '''
+        if name not in self.cache:
+            if name not in self.types:
+                return None
+            self.cache[name] = [ _ for entry in self.types[name] for _ in self.versions(entry) ]
+        result = None
+        for item in self.cache[name]:
+            if version is None or item['version'] <= version:
+                result = item
+        return result
+
+    def items(self):
+        ''' All schemas in file order '''
+        for entry in self.entries:
+            yield from self.versions(entry)
+
+    def versions(self, entry):
+        ''' Reconstruct each version from the base schema and the following deltas '''
+        if 'versions' not in entry:
+            return [ entry ]
+        items = []
+        current = { 'name': entry['name'], 'module': entry['module'] }
+        for delta in entry['versions']:
+            current = dict(current)
+            for key, value in delta.items():
+                if key == '-':
+                    for name in value:
+                        current.pop(name)
+                else:
+                    current[key] = value
+            items.append(self._strings(current))
+        return items
+
+    def _strings(self, value, key=None):
+        if isinstance(value, dict):
+            return { k: self._strings(v, k) for k, v in value.items() }
+        if isinstance(value, list):
+            return [ self._strings(_) for _ in value ]
+        if key in ('description', 'code') and isinstance(value, int):
+            return self.strings[value]
+        return value
+
+class Bundle:
+    ''' Operator schemas of one framework served from shards, or from the full metadata file
+    when running from the source tree '''
+
+    _bundles = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def open(folder, framework):
+        ''' Shared bundle for a framework, None if there is no metadata for it '''
+        with Bundle._lock:
+            key = (folder, framework)
+            if key not in Bundle._bundles:
+                bundle = None
+                if framework.replace('-', '').isalnum():
+                    manifest = os.path.join(folder, 'metadata', framework + '.json')
+                    file = os.path.join(folder, framework + '-metadata.json')
+                    if os.path.exists(manifest) or os.path.exists(file):
+                        bundle = Bundle(manifest, file)
+                Bundle._bundles[key] = bundle
+            return Bundle._bundles[key]
+
+    def __init__(self, manifest, file):
+        self.manifest = None
+        self.types = None
+        if os.path.exists(manifest):
+            with open(manifest, 'r', encoding='utf-8') as handle:
+                self.manifest = json.load(handle)['types']
+            self.shards = manifest[:-len('.json')] + '.shards'
+        else:
+            self.types = {}
+            for name, items in _group(_items(file)).items():
+                content = json.dumps(items, separators=(',', ':'), ensure_ascii=False)
+                self.types[name] = content.encode('utf-8')
+
+    def read(self, names):
+        ''' JSON array with the schemas of the requested operators in metadata file format '''
+        chunks = []
+        if self.manifest is not None:
+            ranges = sorted(self.manifest[_] for _ in set(names) if _ in self.manifest)
+            if ranges:
+                with open(self.shards, 'rb') as handle:
+                    for offset, length in ranges:
+                        handle.seek(offset)
+                        chunks.append(handle.read(length)[1:-1])
+        else:
+            chunks = [ self.types[_][1:-1] for _ in sorted(set(names)) if _ in self.types ]
+        return b'[' + b','.join(_ for _ in chunks if _) + b']'
+
+class Types:
+    ''' Operator schemas by name, read from the framework bundles on first use.
+    Bundles are given as (framework, prefix) pairs and later bundles take precedence. '''
+
+    _types = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def open(folder, frameworks):
+        ''' Shared schemas for a list of bundles '''
+        with Types._lock:
+            key = (folder, tuple(frameworks))
+            if key not in Types._types:
+                Types._types[key] = Types(folder, frameworks)
+            return Types._types[key]
+
+    def __init__(self, folder, frameworks):
+        self.bundles = [ (prefix, Bundle.open(folder, name)) for name, prefix in frameworks ]
+        self.types = {}
+
+    def get(self, name, default=None):
+        ''' Latest schema of the operator, default if there is none '''
+        if name not in self.types:
+            self.types[name] = self._read(name)
+        value = self.types[name]
+        return default if value is None else value
+
+    def setdefault(self, name, default):
+        ''' Schema of the operator, registering default if there is none '''
+        value = self.get(name)
+        if value is None:
+            value = default
+            self.types[name] = value
+        return value
+
+    def __getitem__(self, name):
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def _read(self, name):
+        for prefix, bundle in reversed(self.bundles):
+            if bundle and name.startswith(prefix):
+                items = json.loads(bundle.read([ name[len(prefix):] ]))
+                if items:
+                    return items[-1]
+        return None
@@ -1171,9 +1171,12 @@ onnx.Metadata = class {
 
     constructor(data) {
         this._map = new Map();
+        this._strings = [];
         if (data) {
             const metadata = JSON.parse(data);
-            for (const item of metadata) {
+            const items = Array.isArray(metadata) ? metadata : metadata.types;
+            this._strings = Array.isArray(metadata) ? [] : metadata.strings;
+            for (const item of items) {
                 if (!this._map.has(item.module)) {
                     this._map.set(item.module, new Map());
                 }
@@ -1186,13 +1189,52 @@ onnx.Metadata = class {
         }
     }
 
+    _versions(items) {
+        // Expand the base schema and version deltas of an operator on first use.
+        if (items.length === 1 && items[0].versions) {
+            const entry = items.pop();
+            let current = { name: entry.name, module: entry.module };
+            for (const delta of entry.versions) {
+                current = Object.assign({}, current);
+                for (const key of Object.keys(delta)) {
+                    if (key === '-') {
+                        for (const name of delta[key]) {
+                            delete current[name];
+                        }
+                    } else {
+                        current[key] = delta[key];
+                    }
+                }
+                items.push(this._string(current));
+            }
+        }
+        return items;
+    }
+
+    _string(value, key) {
+        if (Array.isArray(value)) {
+            return value.map((item) => this._string(item));
+        }
+        if (value && typeof value === 'object') {
+            const result = {};
+            for (const key of Object.keys(value)) {
+                result[key] = this._string(value[key], key);
+            }
+            return result;
+        }
+        if ((key === 'description' || key === 'code') && Number.isInteger(value)) {
+            return this._strings[value];
+        }
+        return value;
+    }
+
     type(name, domain, imports) {
         domain = domain || 'ai.onnx';
         let current = null;
         if (this._map.has(domain)) {
             const map = this._map.get(domain);
             if (map.has(name)) {
-                for (const metadata of map.get(name)) {
+                for (const metadata of this._versions(map.get(name))) {
                     const matchVersion = current ? current.version : -1;
                     const importVersion = imports.get(metadata.module) || 0;
                     if (importVersion >= metadata.version && matchVersion < metadata.version) {
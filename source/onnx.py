@@ -2,14 +2,20 @@
 
 import collections
 import enum
-import json
 import os
 
+from . import analysis
+
 class ModelFactory: # pylint: disable=too-few-public-methods
     ''' ONNX backend model factory '''
     def open(self, model): # pylint: disable=missing-function-docstring
         return _Model(model)
 
+    @staticmethod
+    def metadata():
+        ''' Operator metadata shared by all models opened in this process '''
+        return _Metadata()
+
 class _Model: # pylint: disable=too-few-public-methods
     def __init__(self, model):
         ''' Serialize ONNX model to JSON message '''
@@ -17,7 +23,8 @@ class _Model: # pylint: disable=too-few-public-methods
         # model = onnx.shape_inference.infer_shapes(model)
         self.value = model
         self.metadata = _Metadata()
-        self.graph = _Graph(model.graph, self.metadata)
+        self.cost = _Cost(model)
+        self.graph = _Graph(model.graph, self.metadata, self.cost)
 
     def to_json(self): # pylint: disable=missing-function-docstring
         ''' Serialize model to JSON message '''
@@ -33,10 +40,13 @@ class _Model: # pylint: disable=too-few-public-methods
         if model.doc_string and len(model.doc_string):
             json_model['description'] = str(model.doc_string)
         json_metadata = self._metadata_props(model.metadata_props)
+        json_metadata.extend(self.cost.to_json())
+        json_graph = self.graph.to_json()
+        json_metadata.extend(analysis.memory(json_graph))
         if len(json_metadata) > 0:
             json_model['metadata'] = json_metadata
         json_model['graphs'] = []
-        json_model['graphs'].append(self.graph.to_json())
+        json_model['graphs'].append(json_graph)
         return json_model
 
     def _metadata_props(self, metadata_props): # pylint: disable=missing-function-docstring
@@ -73,9 +83,10 @@ class _Model: # pylint: disable=too-few-public-methods
         return json_metadata
 
 class _Graph:
-    def __init__(self, graph, metadata):
+    def __init__(self, graph, metadata, cost=None):
         self.metadata = metadata
         self.value = graph
+        self.cost = cost
         self.arguments_index = {}
         self.arguments = []
 
@@ -84,6 +95,13 @@ class _Graph:
 
     def argument(self, name, tensor_type=None, initializer=None): # pylint: disable=missing-function-docstring
         if not name in self.arguments_index:
+            if tensor_type is None and self.cost and name in self.cost.shapes:
+                dimensions, data_type = self.cost.shapes[name]
+                if data_type in _data_type_name:
+                    tensor_type = {
+                        'dataType': _data_type_name[data_type],
+                        'shape': { 'dimensions': [ _ if _ >= 0 else '?' for _ in dimensions ] }
+                    }
             argument = _Argument(name, tensor_type, initializer)
             self.arguments_index[name] = len(self.arguments)
             self.arguments.append(argument)
@@ -137,6 +155,37 @@ class _Graph:
         json_attribute['value'] = value
         return json_attribute
 
+    def node(self, index, node): # pylint: disable=missing-function-docstring
+        op_type = node.op_type
+        json_node = {}
+        json_node_type = {}
+        json_node_type['name'] = op_type
+        type_metadata = self.metadata.type(op_type)
+        if type and 'category' in type_metadata:
+            json_node_type['category'] = type_metadata['category']
+        json_node['type'] = json_node_type
+        if node.name:
+            json_node['name'] = node.name
+        json_node['inputs'] = []
+        for value in node.input:
+            json_node['inputs'].append({
+                    'name': 'X',
+                    'arguments': [ self.argument(value) ]
+                })
+        json_node['outputs'] = []
+        for value in node.output:
+            json_node['outputs'].append({
+                    'name': 'X',
+                    'arguments': [ self.argument(value) ]
+                })
+        json_node['attributes'] = []
+        for _ in node.attribute:
+            json_attribute = self.attribute(_, op_type)
+            json_node['attributes'].append(json_attribute)
+        if self.cost and self.cost.nodes[index]:
+            json_node['metadata'] = list(self.cost.nodes[index])
+        return json_node
+
     def to_json(self): # pylint: disable=missing-function-docstring
         graph = self.value
         json_graph = {
@@ -149,34 +198,20 @@ class _Graph:
             self.argument(value_info.name)
         for initializer in graph.initializer:
             self.argument(initializer.name, None, initializer)
-        for node in graph.node:
-            op_type = node.op_type
-            json_node = {}
-            json_node_type = {}
-            json_node_type['name'] = op_type
-            type_metadata = self.metadata.type(op_type)
-            if type and 'category' in type_metadata:
-                json_node_type['category'] = type_metadata['category']
-            json_node['type'] = json_node_type
-            if node.name:
-                json_node['name'] = node.name
-            json_node['inputs'] = []
-            for value in node.input:
-                json_node['inputs'].append({
-                        'name': 'X',
-                        'arguments': [ self.argument(value) ]
-                    })
-            json_node['outputs'] = []
-            for value in node.output:
-                json_node['outputs'].append({
-                        'name': 'X',
-                        'arguments': [ self.argument(value) ]
-                    })
-            json_node['attributes'] = []
-            for _ in node.attribute:
-                json_attribute = self.attribute(_, op_type)
-                json_node['attributes'].append(json_attribute)
-            json_graph['nodes'].append(json_node)
+        initializers = set(_.name for _ in graph.initializer)
+        for value_info in graph.input:
+            if value_info.name not in initializers:
+                json_graph['inputs'].append({
+                    'name': value_info.name,
+                    'arguments': [ self.argument(value_info.name) ]
+                })
+        for value_info in graph.output:
+            json_graph['outputs'].append({
+                'name': value_info.name,
+                'arguments': [ self.argument(value_info.name) ]
+            })
+        for index, node in enumerate(graph.node):
+            json_graph['nodes'].append(self.node(index, node))
         for _ in self.arguments:
             json_graph['arguments'].append(_.to_json())
         return json_graph
@@ -190,24 +225,249 @@ class _Argument: # pylint: disable=too-few-public-methods
     def to_json(self): # pylint: disable=missing-function-docstring
         target = {}
         target['name'] = self.name
+        if self.type:
+            target['type'] = self.type
         if self.initializer:
             target['initializer'] = {}
         return target
 
+class _Cost: # pylint: disable=too-few-public-methods
+    ''' Estimate compute and memory cost of nodes from inferred shapes per op_type bucket '''
+
+    def __init__(self, model):
+        self.shapes = {}
+        self.initializers = {}
+        self.nodes = []
+        self.summary = {}
+        graph = model.graph
+        try:
+            import onnx.shape_inference # pylint: disable=import-outside-toplevel,import-error
+            graph = onnx.shape_inference.infer_shapes(model).graph
+        except: # pylint: disable=bare-except
+            pass
+        for value_info in list(graph.input) + list(graph.output) + list(graph.value_info):
+            tensor_type = value_info.type.tensor_type
+            if value_info.type.HasField('tensor_type') and tensor_type.HasField('shape'):
+                dimensions = [ _.dim_value if _.HasField('dim_value') else -1 \
+                    for _ in tensor_type.shape.dim ]
+                self.shapes[value_info.name] = (dimensions, tensor_type.elem_type)
+        for initializer in graph.initializer:
+            self.shapes[initializer.name] = (list(initializer.dims), initializer.data_type)
+            self.initializers[initializer.name] = max(self._size(initializer.name), 0)
+        self._analyze(list(model.graph.node))
+
+    def to_json(self): # pylint: disable=missing-function-docstring
+        return [ { 'name': name, 'value': value } for name, value in self.summary.items() ]
+
+    def _analyze(self, nodes): # pylint: disable=too-many-locals
+        import numpy # pylint: disable=import-outside-toplevel,import-error
+        groups = {}
+        for index, node in enumerate(nodes):
+            groups.setdefault(node.op_type, []).append(index)
+        count = len(nodes)
+        elements = numpy.full(count, -1, dtype=numpy.int64)
+        factors = numpy.zeros(count, dtype=numpy.int64)
+        extras = numpy.zeros(count, dtype=numpy.int64)
+        for op_type, indices in groups.items():
+            estimate = self._estimate(op_type)
+            if estimate is None:
+                continue
+            values = numpy.stack(estimate([ nodes[_] for _ in indices ]))
+            valid = values.min(axis=0) >= 0
+            indices = numpy.array(indices, dtype=numpy.int64)[valid]
+            elements[indices], factors[indices], extras[indices] = values[:, valid]
+        known = elements >= 0
+        macs = numpy.where(known, elements * factors, 0)
+        flops = numpy.where(known, 2 * macs + extras, 0)
+        parameters = [ sum(self.initializers.get(_, 0) for _ in set(node.input)) for node in nodes ]
+        activations = [ sum(max(self._size(_), 0) for _ in node.output) for node in nodes ]
+        for i in range(count):
+            metadata = []
+            if known[i]:
+                metadata.append({ 'name': 'macs', 'value': int(macs[i]) })
+                metadata.append({ 'name': 'flops', 'value': int(flops[i]) })
+            if parameters[i] > 0:
+                metadata.append({ 'name': 'parameter_bytes', 'value': parameters[i] })
+            if activations[i] > 0:
+                metadata.append({ 'name': 'activation_bytes', 'value': activations[i] })
+            self.nodes.append(metadata)
+        self.summary['macs'] = int(macs.sum())
+        self.summary['flops'] = int(flops.sum())
+        self.summary['parameter_bytes'] = sum(self.initializers.values())
+        self.summary['activation_bytes'] = sum(activations)
+
+    def _estimate(self, op_type): # pylint: disable=too-many-return-statements
+        if op_type in ('Conv', 'ConvInteger', 'QLinearConv', 'FusedConv'):
+            return self._conv
+        if op_type == 'ConvTranspose':
+            return self._conv_transpose
+        if op_type in ('Gemm', 'FC'):
+            return self._gemm
+        if op_type in ('MatMul', 'MatMulInteger', 'QLinearMatMul', 'FusedMatMul'):
+            return self._matmul
+        if op_type == 'Attention':
+            return self._attention
+        if op_type == 'MultiHeadAttention':
+            return self._multi_head_attention
+        if op_type in ('AveragePool', 'MaxPool', 'LpPool'):
+            return self._pool
+        if op_type in ('GlobalAveragePool', 'GlobalMaxPool', 'GlobalLpPool'):
+            return self._global_pool
+        if op_type in _Cost.elementwise:
+            return self._elementwise
+        return None
+
+    elementwise = {
+        'Abs': 1, 'Add': 1, 'BatchNormalization': 2, 'Ceil': 1, 'Clip': 1, 'Cos': 1,
+        'Div': 1, 'Elu': 1, 'Erf': 1, 'Exp': 1, 'Floor': 1, 'Gelu': 1, 'HardSigmoid': 1,
+        'HardSwish': 1, 'InstanceNormalization': 2, 'LayerNormalization': 2, 'LeakyRelu': 1,
+        'Log': 1, 'LogSoftmax': 3, 'Max': 1, 'Mean': 1, 'Min': 1, 'Mish': 1, 'Mul': 1,
+        'Neg': 1, 'Pow': 1, 'PRelu': 1, 'Reciprocal': 1, 'Relu': 1, 'Round': 1, 'Selu': 1,
+        'Sigmoid': 1, 'Sign': 1, 'Sin': 1, 'Softmax': 3, 'Softplus': 1, 'Softsign': 1,
+        'Sqrt': 1, 'Sub': 1, 'Sum': 1, 'Tanh': 1, 'ThresholdedRelu': 1, 'Where': 1
+    }
+
+    def _shape(self, name):
+        if name in self.shapes:
+            dimensions = self.shapes[name][0]
+            if all(_ >= 0 for _ in dimensions):
+                return dimensions
+        return None
+
+    def _elements(self, name):
+        shape = self._shape(name)
+        return _product(shape) if shape is not None else -1
+
+    def _size(self, name):
+        if name in self.shapes and self.shapes[name][1] in _data_type_size:
+            elements = self._elements(name)
+            return elements * _data_type_size[self.shapes[name][1]] if elements >= 0 else -1
+        return -1
+
+    def _dims(self, names, width=1):
+        ''' Shapes as rows left-aligned and padded with 1, and ranks with -1 if unknown '''
+        import numpy # pylint: disable=import-outside-toplevel,import-error
+        shapes = [ self._shape(_) for _ in names ]
+        width = max([ width ] + [ len(_) for _ in shapes if _ is not None ])
+        dims = numpy.ones((len(shapes), width), dtype=numpy.int64)
+        ranks = numpy.full(len(shapes), -1, dtype=numpy.int64)
+        for i, shape in enumerate(shapes):
+            if shape is not None:
+                dims[i, :len(shape)] = shape
+                ranks[i] = len(shape)
+        return dims, ranks
+
+    def _counts(self, names):
+        dims, ranks = self._dims(names)
+        counts = dims.prod(axis=1)
+        counts[ranks < 0] = -1
+        return counts
+
+    def _conv(self, nodes):
+        weight, ranks = self._dims([ _.input[3 if _.op_type == 'QLinearConv' else 1] \
+            for _ in nodes ])
+        output = self._counts([ _.output[0] for _ in nodes ])
+        output[ranks < 0] = -1
+        bias = _array([ len(_.input) > 2 and _.op_type in ('Conv', 'FusedConv') for _ in nodes ])
+        return (output, weight[:, 1:].prod(axis=1), bias * output)
+
+    def _conv_transpose(self, nodes):
+        weight, ranks = self._dims([ _.input[1] for _ in nodes ])
+        inputs = self._counts([ _.input[0] for _ in nodes ])
+        inputs[ranks < 0] = -1
+        bias = _array([ len(_.input) > 2 for _ in nodes ])
+        return (inputs, weight[:, 1:].prod(axis=1), bias * self._counts([ _.output[0] \
+            for _ in nodes ]))
+
+    def _gemm(self, nodes):
+        shape, ranks = self._dims([ _.input[0] for _ in nodes ], 2)
+        transpose = _array([ any(_.name == 'transA' and _.i != 0 for _ in node.attribute) \
+            for node in nodes ])
+        output = self._counts([ _.output[0] for _ in nodes ])
+        output[ranks != 2] = -1
+        bias = _array([ len(_.input) > 2 and bool(_.input[2]) for _ in nodes ])
+        return (output, shape[:, 0] * transpose + shape[:, 1] * (1 - transpose), bias * output)
+
+    def _matmul(self, nodes):
+        import numpy # pylint: disable=import-outside-toplevel,import-error
+        shape, ranks = self._dims([ _.input[0] for _ in nodes ])
+        output = self._counts([ _.output[0] for _ in nodes ])
+        output[ranks < 1] = -1
+        return (output, shape[numpy.arange(len(nodes)), numpy.maximum(ranks, 1) - 1], 0 * output)
+
+    def _attention(self, nodes):
+        shape, ranks = self._dims([ _.input[0] for _ in nodes ], 3)
+        weight, weight_ranks = self._dims([ _.input[1] for _ in nodes ], 2)
+        heads = _array([ _attribute(_, 'num_heads', 1) for _ in nodes ])
+        batch, sequence, hidden = shape[:, 0], shape[:, 1], shape[:, 2]
+        rows = batch * sequence
+        rows[(ranks != 3) | (weight_ranks != 2)] = -1
+        projection = hidden * weight[:, 1]
+        scores = 2 * sequence * (weight[:, 1] // 3)
+        return (rows, projection + scores, batch * heads * sequence * sequence)
+
+    def _multi_head_attention(self, nodes):
+        query, ranks = self._dims([ _.input[0] for _ in nodes ], 3)
+        key, key_ranks = self._dims([ _.input[1] if len(_.input) > 1 else '' for _ in nodes ], 3)
+        heads = _array([ _attribute(_, 'num_heads', 1) for _ in nodes ])
+        length = query[:, 1].copy()
+        length[key_ranks == 3] = key[key_ranks == 3, 1]
+        length[key_ranks == 4] = key[key_ranks == 4, 2]
+        elements = query.prod(axis=1)
+        elements[ranks != 3] = -1
+        return (elements, 2 * length, query[:, 0] * heads * query[:, 1] * length)
+
+    def _pool(self, nodes):
+        kernel = [ _attribute(_, 'kernel_shape', None) for _ in nodes ]
+        kernel = _array([ _product(_) if _ is not None else -1 for _ in kernel ])
+        output = self._counts([ _.output[0] for _ in nodes ])
+        output[kernel < 0] = -1
+        return (output, 0 * output, output * kernel)
+
+    def _global_pool(self, nodes):
+        output = self._counts([ _.output[0] for _ in nodes ])
+        return (output, 0 * output, self._counts([ _.input[0] for _ in nodes ]))
+
+    def _elementwise(self, nodes):
+        output = self._counts([ _.output[0] for _ in nodes ])
+        return (output, 0 * output, output * _Cost.elementwise[nodes[0].op_type])
+
+def _attribute(node, name, default):
+    for _ in node.attribute:
+        if _.name == name:
+            return list(_.ints) if _.type == _AttributeType.INTS else _.i
+    return default
+
+def _array(values):
+    import numpy # pylint: disable=import-outside-toplevel,import-error
+    return numpy.array(values, dtype=numpy.int64).reshape(-1)
+
+def _product(values):
+    result = 1
+    for value in values:
+        result *= value
+    return result
+
+_data_type_name = {
+    1: 'float32', 2: 'uint8', 3: 'int8', 4: 'uint16', 5: 'int16', 6: 'int32', 7: 'int64',
+    8: 'string', 9: 'boolean', 10: 'float16', 11: 'float64', 12: 'uint32', 13: 'uint64',
+    14: 'complex64', 15: 'complex128', 16: 'bfloat16', 17: 'float8e4m3fn',
+    18: 'float8e4m3fnuz', 19: 'float8e5m2', 20: 'float8e5m2fnuz'
+}
+
+_data_type_size = {
+    1: 4, 2: 1, 3: 1, 4: 2, 5: 2, 6: 4, 7: 8, 9: 1, 10: 2, 11: 8, 12: 4, 13: 8,
+    14: 8, 15: 16, 16: 2, 17: 1, 18: 1, 19: 1, 20: 1
+}
+
 class _Metadata: # pylint: disable=too-few-public-methods
-    metadata = {}
 
     def __init__(self):
-        metadata_file = os.path.join(os.path.dirname(__file__), 'onnx-metadata.json')
-        with open(metadata_file, 'r', encoding='utf-8') as file:
-            for item in json.load(file):
-                name = item['name']
-                self.metadata[name] = item
+        from . import metadata # pylint: disable=import-outside-toplevel
+        self.types = metadata.Types.open(os.path.dirname(__file__), [ ('onnx', '') ])
 
     def type(self, name): # pylint: disable=missing-function-docstring
-        if name in self.metadata:
-            return self.metadata[name]
-        return {}
+        return self.types.get(name, {})
 
 class _AttributeType(enum.IntEnum):
     UNDEFINED = 0
@@ -0,0 +1,189 @@
+''' Chrome trace profiler overlay '''
+
+import gzip
+import json
+
+from . import analysis
+
+_suffixes = ( '_kernel_time', '_fence_before', '_fence_after' )
+
+class _Reader: # pylint: disable=too-few-public-methods
+    ''' Incremental JSON reader yielding trace events with bounded memory '''
+
+    def __init__(self, stream, size=1048576):
+        self.stream = stream
+        self.size = size
+        self.buffer = ''
+        self.position = 0
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.stream.read(self.size)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def _skip(self, characters=' \t\r\n'):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in characters:
+                self.position += 1
+            if self.position < len(self.buffer) or not self._fill():
+                return self.buffer[self.position] if self.position < len(self.buffer) else ''
+
+    def _expect(self, character):
+        if self._skip() != character:
+            raise ValueError("Expected '" + character + "' in trace file.")
+        self.position += 1
+
+    def _value(self):
+        self._skip()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # A number at the end of the buffer may continue in the next chunk.
+                if end < len(self.buffer) or not self._fill():
+                    self.position = end
+                    return value
+                continue
+            except json.JSONDecodeError as error:
+                if not self._fill():
+                    raise ValueError('Invalid trace file.') from error
+
+    def _array(self):
+        self._expect('[')
+        if self._skip() == ']':
+            self.position += 1
+            return
+        while True:
+            yield self._value()
+            character = self._skip()
+            self.position += 1
+            if character == ']':
+                return
+            if character != ',':
+                raise ValueError("Expected ',' in trace file.")
+
+    def events(self):
+        ''' Iterate over the trace event array of an object or array trace file '''
+        character = self._skip()
+        if character == '[':
+            yield from self._array()
+            return
+        self._expect('{')
+        while self._skip() not in ('}', ''):
+            key = self._value()
+            self._expect(':')
+            if key == 'traceEvents':
+                yield from self._array()
+                return
+            self._value()
+            if self._skip(' \t\r\n,') == '}':
+                return
+
+class Overlay: # pylint: disable=too-few-public-methods
+    ''' Per-operator latency aggregated from a Chrome trace and mapped onto graph nodes '''
+
+    def __init__(self, path):
+        self.names = {}
+        self.types = {}
+        self.threads = {}
+        self.annotated = set()
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as stream:
+            for event in _Reader(stream).events():
+                self._add(event)
+        # Nested events such as aten::addmm inside aten::linear overlap their parent,
+        # so the total is the time covered by operator events on each thread.
+        self.total = sum(_[2] + _[1] - _[0] for _ in self.threads.values())
+        self.threads = None
+        leaves = {}
+        for name in self.names:
+            leaves.setdefault(name.split('/')[-1], []).append(name)
+        self.leaves = { key: value[0] for key, value in leaves.items() if len(value) == 1 }
+
+    def _add(self, event):
+        if not isinstance(event, dict) or event.get('ph') != 'X':
+            return
+        duration = event.get('dur', 0)
+        name = event.get('name', '')
+        category = event.get('cat', None)
+        if not isinstance(duration, (int, float)) or not isinstance(name, str):
+            return
+        if category == 'Node':
+            # ONNX Runtime node events are named after the graph node
+            for suffix in _suffixes:
+                if name.endswith(suffix):
+                    name = name[:-len(suffix)]
+                    if suffix != '_kernel_time':
+                        return
+            entry = self.names.setdefault(name, [ 0, 0 ])
+            entry[0] += 1
+            entry[1] += duration
+            args = event.get('args', {})
+            op_type = args.get('op_name', None) if isinstance(args, dict) else None
+        elif category == 'cpu_op':
+            op_type = name
+        else:
+            return
+        if op_type:
+            entry = self.types.setdefault(op_type, [ 0, 0 ])
+            entry[0] += 1
+            entry[1] += duration
+        timestamp = event.get('ts', 0)
+        timestamp = timestamp if isinstance(timestamp, (int, float)) else 0
+        self._cover((event.get('pid', 0), event.get('tid', 0)), timestamp, timestamp + duration)
+
+    def _cover(self, thread, start, end):
+        # Events of a thread arrive in timestamp order, so each thread keeps only its
+        # current merged interval and the length of the intervals closed before it.
+        if thread not in self.threads:
+            self.threads[thread] = [ start, end, 0 ]
+            return
+        interval = self.threads[thread]
+        if start > interval[1]:
+            interval[2] += interval[1] - interval[0]
+            interval[0] = start
+            interval[1] = end
+        else:
+            interval[0] = min(interval[0], start)
+            interval[1] = max(interval[1], end)
+
+    def _metadata(self, json_node, prefix, calls, duration):
+        analysis.metadata(json_node, prefix + 'time_us', duration)
+        analysis.metadata(json_node, prefix + 'calls', calls)
+        analysis.metadata(json_node, prefix + 'share', duration / self.total if self.total else 0)
+
+    def _name(self, json_graph, name):
+        scope = json_graph.get('name', '')
+        for key in ( name, scope + '/' + name if scope else None ):
+            if key in self.names:
+                return key
+        return self.leaves.get(name.split('/')[-1], None) if name else None
+
+    def apply(self, json_graph, key):
+        ''' Attach profiled latency to node metadata once per graph key.
+
+        Nodes are matched to profiled node names by their name, their name within the
+        graph scope, or an unambiguous last name component. Other nodes share the timings
+        of their operator type evenly with the other unmatched nodes of that type in the
+        graph, labeled profile_op_type_*, as the trace cannot tell those nodes apart.
+        '''
+        if key in self.annotated:
+            return json_graph
+        self.annotated.add(key)
+        fallback = {}
+        for json_node in json_graph['nodes']:
+            name = self._name(json_graph, json_node.get('name', ''))
+            if name is not None:
+                entry = self.names[name]
+                self._metadata(json_node, 'profile_', entry[0], entry[1])
+            elif json_node['type']['name'] in self.types:
+                fallback.setdefault(json_node['type']['name'], []).append(json_node)
+        for op_type, json_nodes in fallback.items():
+            calls, duration = self.types[op_type]
+            for json_node in json_nodes:
+                self._metadata(json_node, 'profile_op_type_',
+                    max(calls // len(json_nodes), 1), duration / len(json_nodes))
+        return json_graph
@@ -1,56 +1,165 @@
 ''' PyTorch backend '''
 
+import functools
+import hashlib
 import json
 import os
+import re
+import sys
+import threading
+
+from . import analysis
 
 class ModelFactory: # pylint: disable=too-few-public-methods
     ''' PyTorch backend model factory '''
+    _metadata = None
+    _lock = threading.Lock()
+
     def open(self, model): # pylint: disable=missing-function-docstring
-        metadata = {}
-        metadata_files = [
-            ('pytorch-metadata.json', ''),
-            ('onnx-metadata.json', 'onnx::')
-        ]
-        path = os.path.dirname(__file__)
-        for entry in metadata_files:
-            file = os.path.join(path, entry[0])
-            with open(file, 'r', encoding='utf-8') as handle:
-                for item in json.load(handle):
-                    name = entry[1] + item['name']
-                    metadata[name] = item
-        metadata = Metadata(metadata)
-        return _Model(metadata, model)
+        return _Model(ModelFactory.metadata(), model)
+
+    @staticmethod
+    def metadata():
+        ''' Metadata shared by all models opened in this process '''
+        with ModelFactory._lock:
+            if ModelFactory._metadata is None:
+                import torch # pylint: disable=import-outside-toplevel,import-error
+                from . import metadata # pylint: disable=import-outside-toplevel
+                frameworks = [ ('pytorch', ''), ('onnx', 'onnx::') ]
+                types = metadata.Types.open(os.path.dirname(__file__), frameworks)
+                digest = _digest(os.path.join(os.path.dirname(__file__), 'pytorch-metadata.json'))
+                cache = 'pytorch-' + torch.__version__ + '-' + digest + '.json'
+                cache = os.path.join(_cache_dir(), cache)
+                ModelFactory._metadata = Metadata(types, cache)
+            return ModelFactory._metadata
 
 class _Model: # pylint: disable=too-few-public-methods
     def __init__(self, metadata, model):
-        self.graph = _Graph(metadata, model)
+        self.metadata = metadata
+        self.subgraphs = _Subgraphs(metadata)
+        self.graph = _Graph(metadata, model, None, self.subgraphs)
+
+    def subgraph(self, index):
+        ''' Serialize method, block or module scope subgraph on first request '''
+        return self.subgraphs.to_json(index)
 
     def to_json(self):
         ''' Serialize model to JSON message '''
         import torch # pylint: disable=import-outside-toplevel,import-error
+        json_graph = self.graph.to_json()
+        self.metadata.save()
+        json_metadata = [ { 'name': name, 'value': value } \
+            for name, value in self.graph.summary.items() ]
+        json_metadata.extend(analysis.memory(json_graph))
+        json_graph = self.graph.group(json_graph)
         json_model = {
             'signature': 'netron:pytorch',
             'format': 'TorchScript v' + torch.__version__,
-            'graphs': [ self.graph.to_json() ]
+            'metadata': json_metadata,
+            'graphs': [ json_graph ]
         }
         return json_model
 
-class _Graph: # pylint: disable=too-few-public-methods
+class _Subgraphs(analysis.Subgraphs):
+    ''' Method, block and module scope subgraphs serialized on first request '''
 
-    def __init__(self, metadata, model):
+    def __init__(self, metadata):
+        super().__init__()
+        self.metadata = metadata
+
+    def graph(self, key, name, param, graph): # pylint: disable=missing-function-docstring
+        def callback():
+            json_graph = _Graph(self.metadata, param, graph, self).to_json()
+            analysis.memory(json_graph)
+            self.metadata.save()
+            return json_graph
+        return self.add(key, name, callback)
+
+class _Graph: # pylint: disable=too-few-public-methods,too-many-instance-attributes
+
+    def __init__(self, metadata, model, graph=None, subgraphs=None):
         self.metadata = metadata
         self.param = model
-        self.value = model.graph
+        self.value = graph if graph is not None else model.graph
+        self.subgraphs = subgraphs
         self.nodes = []
+        self.attributes = {}
+        self.tensors = {}
+        self.summary = { 'parameter_bytes': 0, 'shared_parameters': 0 }
+        self.scopes = []
 
     def _getattr(self, node):
-        if node.kind() == 'prim::Param':
-            return (self.param, '')
-        if node.kind() == 'prim::GetAttr':
+        chain = []
+        while node not in self.attributes:
+            kind = node.kind()
+            if kind == 'prim::Param':
+                self.attributes[node] = (self.param, '')
+                break
+            if kind != 'prim::GetAttr':
+                raise NotImplementedError()
+            chain.append(node)
+            node = node.input().node()
+        obj, parent = self.attributes[node]
+        while len(chain) > 0:
+            node = chain.pop()
             name = node.s('name')
-            obj, parent = self._getattr(node.input().node())
-            return (getattr(obj, name), parent + '.' + name if len(parent) > 0 else name)
-        raise NotImplementedError()
+            obj = getattr(obj, name)
+            parent = parent + '.' + name if len(parent) > 0 else name
+            self.attributes[node] = (obj, parent)
+        return (obj, parent)
+
+    def _subgraph(self, json_node, name, index):
+        json_node['attributes'].append({
+            'name': name,
+            'type': 'graph',
+            'value': {
+                'name': self.subgraphs.entries[index][0],
+                'reference': 'graphs/' + str(index)
+            }
+        })
+
+    def _call_method(self, node, inputs, producers, json_node):
+        name = node.s('name')
+        try:
+            obj, _ = self._getattr(producers[0])
+        except NotImplementedError:
+            return
+        method = getattr(obj, name, None)
+        if not hasattr(method, 'graph') and hasattr(obj, '_c'):
+            try:
+                method = obj._c._get_method(name) # pylint: disable=protected-access
+            except RuntimeError:
+                method = None
+        if method is not None and hasattr(method, 'graph'):
+            module_type = str(inputs[0].type())
+            label = module_type.rsplit('.', maxsplit=1)[-1] + '.' + name
+            index = self.subgraphs.graph((module_type, name), label, obj, method.graph)
+            self._subgraph(json_node, name, index)
+
+    def _blocks(self, node, kind, json_node):
+        names = { 'prim::If': [ 'then', 'else' ], 'prim::Loop': [ 'body' ] }.get(kind, [])
+        for i, block in enumerate(node.blocks()):
+            name = names[i] if i < len(names) else 'block' + str(i)
+            label = kind.split('::')[-1] + '.' + name
+            index = self.subgraphs.graph(None, label, self.param, block)
+            self._subgraph(json_node, name, index)
+
+    def _label(self, path):
+        name = path[-1]
+        obj = self.param
+        for item in name.split('.'):
+            obj = getattr(obj, item, None)
+        return getattr(obj, 'original_name', name.split('.')[-1])
+
+    def group(self, json_graph):
+        ''' Collapse traced nodes into module scope groups '''
+        if self.subgraphs is None:
+            return json_graph
+        paths = []
+        for scope in self.scopes:
+            items = scope.split('/') if scope else []
+            paths.append(tuple(_[9:] for _ in items if _.startswith('__module.')))
+        return analysis.group(json_graph, paths, self._label, self.subgraphs.add)
 
     def to_json(self): # pylint: disable=missing-function-docstring,too-many-locals,too-many-statements,too-many-branches
         import torch # pylint: disable=import-outside-toplevel,import-error
@@ -63,10 +172,18 @@ class _Graph: # pylint: disable=too-few-public-methods
         }
         data_type_map = dict([
             [ torch.float16, 'float16'], # pylint: disable=no-member
+            [ torch.bfloat16, 'bfloat16'], # pylint: disable=no-member
             [ torch.float32, 'float32'], # pylint: disable=no-member
             [ torch.float64, 'float64'], # pylint: disable=no-member
+            [ torch.bool, 'boolean'], # pylint: disable=no-member
+            [ torch.int8, 'int8'], # pylint: disable=no-member
+            [ torch.uint8, 'uint8'], # pylint: disable=no-member
+            [ torch.int16, 'int16'], # pylint: disable=no-member
             [ torch.int32, 'int32'], # pylint: disable=no-member
             [ torch.int64, 'int64'], # pylint: disable=no-member
+            [ torch.qint8, 'qint8'], # pylint: disable=no-member
+            [ torch.quint8, 'quint8'], # pylint: disable=no-member
+            [ torch.qint32, 'qint32'], # pylint: disable=no-member
         ])
         def constant_value(node):
             if node.hasAttribute('value'):
@@ -79,12 +196,25 @@ class _Graph: # pylint: disable=too-few-public-methods
                 json_argument = {}
                 json_argument['name'] = str(value.unique())
                 node = value.node()
+                key = None
                 if node.kind() == "prim::GetAttr":
                     tensor, name = self._getattr(node)
                     if tensor is not None and len(name) > 0 and \
                         isinstance(tensor, torch.Tensor):
+                        key = _storage_key(tensor)
+                        if key in self.tensors:
+                            index = self.tensors[key]
+                            json_initializer = json_graph['arguments'][index]['initializer']
+                            aliases = json_initializer.get('aliases', [])
+                            if name != json_graph['arguments'][index]['name'] and \
+                                name not in aliases:
+                                json_initializer['aliases'] = aliases + [ name ]
+                                self.summary['shared_parameters'] += 1
+                            arguments_map[value] = index
+                            return index
                         json_argument['name'] = name
-                        json_argument['initializer'] = {}
+                        json_argument['initializer'] = analysis.tensor_statistics(tensor)
+                        self.summary['parameter_bytes'] += json_argument['initializer']['bytes']
                         json_tensor_shape = {
                             'dimensions': list(tensor.shape)
                         }
@@ -113,6 +243,8 @@ class _Graph: # pylint: disable=too-few-public-methods
                     }
                 arguments = json_graph['arguments']
                 arguments_map[value] = len(arguments)
+                if key is not None:
+                    self.tensors[key] = len(arguments)
                 arguments.append(json_argument)
             return arguments_map[value]
 
@@ -128,24 +260,16 @@ class _Graph: # pylint: disable=too-few-public-methods
                 'arguments': [ argument(value) ]
             })
         constants = {}
-        for node in graph.nodes():
-            if node.kind() == 'prim::Constant':
-                constants[node] = 0
-
         lists = {}
-        for node in graph.nodes():
-            if node.kind() == 'prim::ListConstruct':
-                if all(_.node() in constants for _ in node.inputs()):
-                    for _ in node.inputs():
-                        constants[_.node()] += 1
-                    lists[node] = 0
+        kinds = {}
+        uses = {}
 
-        def create_node(node):
+        def create_node(node, kind, inputs, producers):
             schema = node.schema() if hasattr(node, 'schema') else None
             schema = self.metadata.type(schema) if schema and schema != '(no schema)' else None
             json_node = {
                 'type': {
-                    'name': node.kind(),
+                    'name': kind,
                     'category': schema['category'] if schema and 'category' in schema else ''
                 },
                 'inputs': [],
@@ -153,26 +277,14 @@ class _Graph: # pylint: disable=too-few-public-methods
                 'attributes': []
             }
             json_graph['nodes'].append(json_node)
-            for name in node.attributeNames():
-                selector = node.kindOf(name)
-                value = getattr(node, selector)(name)
-                json_attribute = {
-                    'name': name,
-                    'value': value
-                }
-                if torch.is_tensor(value):
-                    json_node['inputs'].append({
-                        'name': name,
-                        'arguments': []
-                    })
-                else:
-                    json_node['attributes'].append(json_attribute)
+            self.scopes.append(node.scopeName())
+            _node_attributes(node, json_node)
 
-            for i, value in enumerate(node.inputs()):
+            for i, value in enumerate(inputs):
                 parameter = schema['inputs'][i] if schema and i < len(schema['inputs']) else None
                 parameter_name = parameter['name'] if parameter and 'name' in parameter else 'input'
                 parameter_type = parameter['type'] if parameter and 'type' in parameter else None
-                input_node = value.node()
+                input_node = producers[i]
                 if input_node in constants:
                     if parameter_type == 'Tensor' or value.type().kind() == 'TensorType':
                         json_node['inputs'].append({
@@ -197,9 +309,8 @@ class _Graph: # pylint: disable=too-few-public-methods
                     json_node['attributes'].append(json_attribute)
                     lists[input_node] += 1
                     continue
-                if input_node.kind() == 'prim::TupleUnpack':
-                    continue
-                if input_node.kind() == 'prim::TupleConstruct':
+                input_kind = kinds[input_node] if input_node in kinds else input_node.kind()
+                if input_kind in ('prim::TupleUnpack', 'prim::TupleConstruct'):
                     continue
                 json_node['inputs'].append({
                     'name': parameter_name,
@@ -214,61 +325,159 @@ class _Graph: # pylint: disable=too-few-public-methods
                     'arguments': [ argument(value) ]
                 })
 
-        for node in graph.nodes():
-            if node in lists:
-                continue
-            if node in constants:
-                continue
-            if node.kind() == 'prim::GetAttr':
-                continue
-            create_node(node)
+            if self.subgraphs is not None and kind.startswith('prim::'):
+                if kind == 'prim::CallMethod':
+                    self._call_method(node, inputs, producers, json_node)
+                self._blocks(node, kind, json_node)
+
+        def count_uses(block):
+            for node in block.nodes():
+                for value in node.inputs():
+                    producer = value.node()
+                    if producer in uses:
+                        uses[producer] += 1
+                for _ in node.blocks():
+                    count_uses(_)
+            for value in block.returnNode().inputs():
+                producer = value.node()
+                if producer in uses:
+                    uses[producer] += 1
 
+        pending = []
         for node in graph.nodes():
-            if node.kind() == 'prim::Constant' and \
-                node in constants and constants[node] != len(node.output().uses()):
-                create_node(node)
-            if node.kind() == 'prim::ListConstruct' and \
-                node in lists and lists[node] != len(node.output().uses()):
-                create_node(node)
+            kind = node.kind()
+            kinds[node] = kind
+            inputs = list(node.inputs())
+            producers = [ _.node() for _ in inputs ]
+            for producer in producers:
+                if producer in uses:
+                    uses[producer] += 1
+            if kind.startswith('prim::'):
+                for block in node.blocks():
+                    count_uses(block)
+            if kind == 'prim::Constant':
+                constants[node] = 0
+                uses[node] = 0
+                pending.append((node, kind))
+            elif kind == 'prim::ListConstruct' and all(_ in constants for _ in producers):
+                for producer in producers:
+                    constants[producer] += 1
+                lists[node] = 0
+                uses[node] = 0
+                pending.append((node, kind))
+            elif kind != 'prim::GetAttr':
+                create_node(node, kind, inputs, producers)
+        return_node = graph.return_node() if hasattr(graph, 'return_node') else graph.returnNode()
+        for value in return_node.inputs():
+            producer = value.node()
+            if producer in uses:
+                uses[producer] += 1
+
+        for node, kind in pending:
+            count = constants[node] if kind == 'prim::Constant' else lists[node]
+            if count != uses[node]:
+                inputs = list(node.inputs())
+                create_node(node, kind, inputs, [ _.node() for _ in inputs ])
 
         return json_graph
 
+def _storage_key(tensor):
+    try:
+        pointer = tensor.untyped_storage().data_ptr()
+    except (RuntimeError, NotImplementedError):
+        return None
+    if pointer == 0:
+        return None
+    return (pointer, tensor.storage_offset(), tuple(tensor.shape), tuple(tensor.stride()), \
+        tensor.dtype)
+
+def _node_attributes(node, json_node):
+    import torch # pylint: disable=import-outside-toplevel,import-error
+    for name in node.attributeNames():
+        selector = node.kindOf(name)
+        value = getattr(node, selector)(name)
+        json_attribute = {
+            'name': name,
+            'value': value
+        }
+        if torch.is_tensor(value):
+            json_node['inputs'].append({
+                'name': name,
+                'arguments': []
+            })
+        else:
+            json_node['attributes'].append(json_attribute)
+
 class Metadata: # pylint: disable=too-few-public-methods,missing-class-docstring
 
-    def __init__(self, metadata):
+    def __init__(self, metadata, cache=None):
         self.types = metadata
         self.cache = set()
         self._primitives = {
             'int': 'int64', 'float': 'float32', 'bool': 'boolean', 'str': 'string'
         }
+        self._store = _SchemaStore(cache) if cache else None
+        self.lock = threading.RLock()
 
     def type(self, schema): # pylint: disable=missing-function-docstring
         key = schema.name if isinstance(schema, Schema) else schema.split('(', 1)[0].strip()
-        if key not in self.cache:
-            self.cache.add(key)
-            schema = schema if isinstance(schema, Schema) else Schema(schema)
-            arguments = list(filter(lambda _: \
-                not(_.kwarg_only and hasattr(_, 'alias')), schema.arguments))
-            returns = schema.returns
-            value = self.types.setdefault(schema.name, { 'name': schema.name, })
-            inputs = value.get('inputs', [])
-            outputs = value.get('outputs', [])
-            inputs = [ inputs[i] if i < len(inputs) else {} for i in range(len(arguments)) ]
-            outputs = [ outputs[i] if i < len(outputs) else {} for i in range(len(returns)) ]
-            value['inputs'] = inputs
-            value['outputs'] = outputs
-            for i, _ in enumerate(arguments):
-                argument = inputs[i]
+        # Subgraphs serialize on server threads, so schemas can resolve concurrently
+        with self.lock:
+            if key not in self.cache:
+                self._merge(self._lookup(schema))
+                self.cache.add(key)
+            return self.types[key]
+
+    def _lookup(self, schema):
+        resolved = self._store.get(schema) if self._store and isinstance(schema, str) else None
+        if resolved is None:
+            parsed = schema if isinstance(schema, Schema) else Schema.parse(schema)
+            resolved = self._resolve(parsed)
+            if self._store and isinstance(schema, str):
+                self._store.set(schema, resolved)
+        return resolved
+
+    def _merge(self, resolved):
+        name = resolved['name']
+        value = self.types.setdefault(name, { 'name': name, })
+        inputs = value.get('inputs', [])
+        outputs = value.get('outputs', [])
+        inputs = [ inputs[i] if i < len(inputs) else {} \
+            for i in range(len(resolved['inputs'])) ]
+        outputs = [ outputs[i] if i < len(outputs) else {} \
+            for i in range(len(resolved['outputs'])) ]
+        value['inputs'] = inputs
+        value['outputs'] = outputs
+        for argument, entry in zip(inputs + outputs, resolved['inputs'] + resolved['outputs']):
+            for field in ('type', 'optional'):
+                if field not in entry:
+                    argument.pop(field, None)
+            argument.update(entry)
+
+    def save(self):
+        ''' Persist newly resolved schemas '''
+        with self.lock:
+            if self._store:
+                self._store.save()
+
+    def _resolve(self, schema):
+        arguments = list(filter(lambda _: \
+            not(_.kwarg_only and hasattr(_, 'alias')), schema.arguments))
+        inputs = []
+        outputs = []
+        for _ in arguments:
+            argument = { 'name': _.name }
+            self._argument(argument, getattr(_, 'type'))
+            if hasattr(_, 'default'):
+                argument['default'] = _.default
+            inputs.append(argument)
+        for _ in schema.returns:
+            argument = {}
+            if hasattr(_, 'name'):
                 argument['name'] = _.name
-                self._argument(argument, getattr(_, 'type'))
-                if hasattr(_, 'default'):
-                    argument['default'] = _.default
-            for i, _ in enumerate(returns):
-                argument = outputs[i]
-                if hasattr(_, 'name'):
-                    argument['name'] = _.name
-                self._argument(argument, getattr(_, 'type'))
-        return self.types[key]
+            self._argument(argument, getattr(_, 'type'))
+            outputs.append(argument)
+        return { 'name': schema.name, 'inputs': inputs, 'outputs': outputs }
 
     def _argument(self, argument, value):
         optional = False
@@ -297,6 +506,63 @@ class Metadata: # pylint: disable=too-few-public-methods,missing-class-docstring
         else:
             argument.pop('optional', False)
 
+class _SchemaStore:
+    ''' Resolved operator schemas persisted across processes '''
+    version = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.schemas = None
+        self.changes = {}
+
+    def get(self, schema): # pylint: disable=missing-function-docstring
+        if self.schemas is None:
+            self.schemas = self._load()
+        return self.schemas.get(schema)
+
+    def set(self, schema, value): # pylint: disable=missing-function-docstring
+        self.schemas[schema] = value
+        self.changes[schema] = value
+
+    def save(self): # pylint: disable=missing-function-docstring
+        if len(self.changes) == 0:
+            return
+        schemas = self._load()
+        schemas.update(self.changes)
+        content = json.dumps({ 'version': self.version, 'schemas': schemas }, \
+            ensure_ascii=False, separators=(',', ':'))
+        temp = self.path + '.' + str(os.getpid()) + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temp, 'w', encoding='utf-8') as file:
+                file.write(content)
+            os.replace(temp, self.path)
+            self.changes = {}
+        except OSError:
+            pass
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                content = json.load(file)
+            if content.get('version') == self.version:
+                return content['schemas']
+        except (OSError, ValueError, AttributeError, KeyError):
+            pass
+        return {}
+
+def _digest(path):
+    ''' Short content hash keying cached schemas to the metadata they were merged into '''
+    try:
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()[0:16]
+    except OSError:
+        return ''
+
+def _cache_dir():
+    path = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(path, 'netron')
+
 class Schema: # pylint: disable=too-few-public-methods,missing-class-docstring
     def __init__(self, value):
         lexer = Schema.Lexer(value)
@@ -309,6 +575,10 @@ class Schema: # pylint: disable=too-few-public-methods,missing-class-docstring
             lexer.expect('->')
             lexer.whitespace(0)
             self._parse_returns(lexer)
+    @staticmethod
+    def parse(value):
+        ''' Parse schema string, sharing the result between identical strings '''
+        return _parse_schema(sys.intern(value))
     def __str__(self):
         arguments = []
         kwarg_only = False
@@ -517,51 +787,23 @@ class Schema: # pylint: disable=too-few-public-methods,missing-class-docstring
                 return False
             self.next()
             return True
-        def next(self): # pylint: disable=missing-function-docstring,too-many-branches
+        _tokens = re.compile(
+            r'( +)|(\.\.\.)|([():.\[\],=?!*|])|([A-Za-z_][A-Za-z0-9_]*)|(->)|([0-9-][0-9.e-]*)|' +
+            r"""('(?:\\['"\\]|[^'])*'?|"(?:\\['"\\]|[^"])*"?)""")
+        _kinds = ( None, ' ', '...', None, 'id', '->', '#', 'string' )
+        def next(self): # pylint: disable=missing-function-docstring
             self.position += len(self.value)
-            i = self.position
-            if i >= len(self.buffer):
+            match = self._tokens.match(self.buffer, self.position)
+            if match:
+                index = match.lastindex
+                self.value = match.group(index)
+                self.kind = self._kinds[index] or self.value
+            elif self.position >= len(self.buffer):
                 self.kind = '\0'
                 self.value = ''
-            elif self.buffer[i] == ' ':
-                while self.buffer[i] == ' ':
-                    i += 1
-                self.kind = ' '
-                self.value = self.buffer[self.position:i]
-            elif self.buffer[i] == '.' and self.buffer[i+1] == '.' and self.buffer[i+2] == '.':
-                self.kind = '...'
-                self.value = '...'
-            elif self.buffer[i] in ('(', ')', ':', '.', '[', ']', ',', '=', '?', '!', '*', '|'):
-                self.kind = self.buffer[i]
-                self.value = self.buffer[i]
-            elif (self.buffer[i] >= 'a' and self.buffer[i] <= 'z') or \
-                 (self.buffer[i] >= 'A' and self.buffer[i] <= 'Z') or self.buffer[i] == '_':
-                i += 1
-                while i < len(self.buffer) and \
-                    ((self.buffer[i] >= 'a' and self.buffer[i] <= 'z') or \
-                     (self.buffer[i] >= 'A' and self.buffer[i] <= 'Z') or \
-                     (self.buffer[i] >= '0' and self.buffer[i] <= '9') or self.buffer[i] == '_'):
-                    i += 1
-                self.kind = 'id'
-                self.value = self.buffer[self.position:i]
-            elif self.buffer[i] == '-' and self.buffer[i+1] == '>':
-                self.kind = '->'
-                self.value = '->'
-            elif (self.buffer[i] >= '0' and self.buffer[i] <= '9') or self.buffer[i] == '-':
-                i += 1
-                while i < len(self.buffer) and \
-                    ((self.buffer[i] >= '0' and self.buffer[i] <= '9') or \
-                    self.buffer[i] == '.' or self.buffer[i] == 'e' or self.buffer[i] == '-'):
-                    i += 1
-                self.kind = '#'
-                self.value = self.buffer[self.position:i]
-            elif self.buffer[i] in ("'", '"'):
-                quote = self.buffer[i]
-                i += 1
-                while i < len(self.buffer) and self.buffer[i] != quote:
-                    i += 2 if self.buffer[i] == '\\' and self.buffer[i+1] in ("'", '"', '\\') else 1
-                i += 1
-                self.kind = 'string'
-                self.value = self.buffer[self.position:i]
             else:
-                raise NotImplementedError("Unsupported token at " + self.position)
+                raise NotImplementedError("Unsupported token at " + str(self.position))
+
+@functools.lru_cache(maxsize=8192)
+def _parse_schema(value):
+    return Schema(value)
@@ -0,0 +1,175 @@
+''' PyTorch FX and torch.export backend '''
+
+from . import analysis
+from . import pytorch
+
+class ModelFactory: # pylint: disable=too-few-public-methods
+    ''' PyTorch FX backend model factory '''
+    def open(self, model): # pylint: disable=missing-function-docstring
+        return _Model(pytorch.ModelFactory.metadata(), model)
+
+class _Model: # pylint: disable=too-few-public-methods
+    def __init__(self, metadata, model):
+        self.metadata = metadata
+        self.value = model
+        self.graph = _Graph(metadata, model)
+
+    def tensor(self, name):
+        ''' Statistics of a parameter, buffer or constant computed on request '''
+        tensor = self.graph.initializers.get(name, None)
+        return analysis.tensor_statistics(tensor) if tensor is not None else None
+
+    def to_json(self):
+        ''' Serialize model to JSON message '''
+        import torch # pylint: disable=import-outside-toplevel,import-error
+        json_graph = self.graph.to_json()
+        self.metadata.save()
+        name = 'torch.export' if hasattr(self.value, 'graph_signature') else 'torch.fx'
+        json_model = {
+            'signature': 'netron:pytorch',
+            'format': name + ' v' + torch.__version__,
+            'metadata': analysis.memory(json_graph),
+            'graphs': [ json_graph ]
+        }
+        return json_model
+
+class _Graph: # pylint: disable=too-few-public-methods
+
+    def __init__(self, metadata, model):
+        self.metadata = metadata
+        self.tensors = {}
+        self.initializers = {}
+        if hasattr(model, 'graph_signature'):
+            self.module = model.graph_module
+            signature = model.graph_signature
+            constants = getattr(model, 'constants', {})
+            mappings = [
+                signature.inputs_to_parameters,
+                signature.inputs_to_buffers,
+                getattr(signature, 'inputs_to_lifted_tensor_constants', {})
+            ]
+            for mapping in mappings:
+                for name, target in mapping.items():
+                    tensor = model.state_dict.get(target, constants.get(target, None))
+                    self.tensors[name] = (target, tensor)
+        else:
+            self.module = model
+        self.value = self.module.graph
+
+    def _schema(self, target):
+        schema = getattr(target, '_schema', None)
+        if schema is not None:
+            try:
+                return schema.name, self.metadata.type(str(schema))
+            except (SyntaxError, NotImplementedError, IndexError, AttributeError):
+                return schema.name, self.metadata.types.get(schema.name, None)
+        module = getattr(target, '__module__', None)
+        name = getattr(target, '__name__', str(target))
+        return (module + '.' + name if module else name), None
+
+    def to_json(self): # pylint: disable=missing-function-docstring,too-many-locals,too-many-statements
+        import torch # pylint: disable=import-outside-toplevel,import-error
+        json_graph = { 'arguments': [], 'nodes': [], 'inputs': [], 'outputs': [] }
+        arguments_map = {}
+        def argument(node):
+            if not node in arguments_map:
+                json_argument = {}
+                json_argument['name'] = node.name
+                json_type = _tensor_type(node.meta.get('val', None))
+                tensor = None
+                if node.op == 'placeholder' and node.name in self.tensors:
+                    json_argument['name'], tensor = self.tensors[node.name]
+                elif node.op == 'get_attr':
+                    json_argument['name'] = node.target
+                    tensor = _fetch(self.module, node.target)
+                if isinstance(tensor, torch.Tensor):
+                    # Statistics are computed on request through _Model.tensor
+                    self.initializers[json_argument['name']] = tensor
+                    json_argument['initializer'] = {
+                        'bytes': tensor.numel() * tensor.element_size()
+                    }
+                    json_type = _tensor_type(tensor)
+                if json_type:
+                    json_argument['type'] = json_type
+                arguments = json_graph['arguments']
+                arguments_map[node] = len(arguments)
+                arguments.append(json_argument)
+            return arguments_map[node]
+
+        def create_input(json_node, name, value):
+            if isinstance(value, torch.fx.Node):
+                json_node['inputs'].append({ 'name': name, 'arguments': [ argument(value) ] })
+            elif isinstance(value, (list, tuple)) and \
+                any(isinstance(_, torch.fx.Node) for _ in value):
+                json_node['inputs'].append({
+                    'name': name,
+                    'arguments': [ argument(_) for _ in value if isinstance(_, torch.fx.Node) ]
+                })
+            else:
+                json_node['attributes'].append({ 'name': name, 'value': _value(value) })
+
+        def create_node(node):
+            schema = None
+            if node.op == 'call_function':
+                name, schema = self._schema(node.target)
+            elif node.op == 'call_module':
+                module = type(_fetch(self.module, node.target))
+                name = module.__module__ + '.' + module.__name__
+                schema = self.metadata.types.get(name, None)
+            else:
+                name = str(node.target)
+            json_node = analysis.node(name, schema, node.name)
+            json_graph['nodes'].append(json_node)
+            parameters = schema['inputs'] if schema and 'inputs' in schema else []
+            for i, value in enumerate(node.args):
+                parameter = parameters[i] if i < len(parameters) else {}
+                create_input(json_node, parameter.get('name', 'input'), value)
+            for key, value in node.kwargs.items():
+                create_input(json_node, key, value)
+            parameters = schema['outputs'] if schema and 'outputs' in schema else []
+            parameter = parameters[0] if len(parameters) > 0 else {}
+            json_node['outputs'].append({
+                'name': parameter.get('name', 'output'),
+                'arguments': [ argument(node) ]
+            })
+
+        for node in self.value.nodes:
+            if node.op == 'placeholder':
+                if node.name not in self.tensors:
+                    json_graph['inputs'].append({
+                        'name': node.name,
+                        'arguments': [ argument(node) ]
+                    })
+            elif node.op == 'output':
+                values = node.args[0] if isinstance(node.args[0], (list, tuple)) else node.args
+                for value in values:
+                    if isinstance(value, torch.fx.Node):
+                        json_graph['outputs'].append({
+                            'name': value.name,
+                            'arguments': [ argument(value) ]
+                        })
+            elif node.op != 'get_attr':
+                create_node(node)
+        return json_graph
+
+def _fetch(module, target):
+    value = module
+    for name in target.split('.'):
+        value = getattr(value, name)
+    return value
+
+def _tensor_type(value):
+    import torch # pylint: disable=import-outside-toplevel,import-error
+    if not isinstance(value, torch.Tensor):
+        return None
+    data_type = str(value.dtype).rsplit('.', maxsplit=1)[-1]
+    data_type = { 'bool': 'boolean' }.get(data_type, data_type)
+    dimensions = [ _ if isinstance(_, int) else str(_) for _ in value.shape ]
+    return { 'dataType': data_type, 'shape': { 'dimensions': dimensions } }
+
+def _value(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [ _value(_) for _ in value ]
+    return str(value)
@@ -0,0 +1,300 @@
+''' PyTorch nn.Module structural backend '''
+
+import time
+
+from . import analysis
+from . import pytorch
+
+class ModelFactory: # pylint: disable=too-few-public-methods
+    ''' PyTorch nn.Module backend model factory '''
+    def open(self, model): # pylint: disable=missing-function-docstring
+        return _Model(pytorch.ModelFactory.metadata(), model)
+
+class _Model:
+    def __init__(self, metadata, model):
+        self.value = model
+        self.hierarchy = _Hierarchy(model)
+        self.metadata = metadata
+        self.subgraphs = analysis.Subgraphs()
+
+    def capture(self, inputs):
+        ''' Run one example batch with forward hooks and record runtime statistics '''
+        self.hierarchy.capture = _Capture(self.hierarchy)
+        self.hierarchy.capture.run(self.value, inputs)
+
+    def subgraph(self, index):
+        ''' Serialize module subgraph on first request '''
+        return self.subgraphs.to_json(index)
+
+    def tensor(self, name):
+        ''' Statistics of a parameter or buffer computed on request '''
+        import torch # pylint: disable=import-outside-toplevel,import-error
+        owner, _, key = name.rpartition('.')
+        module = self.hierarchy.modules.get(owner, None)
+        tensor = getattr(module, key, None) if module is not None else None
+        if not isinstance(tensor, torch.Tensor):
+            return None
+        return analysis.tensor_statistics(tensor)
+
+    def to_json(self):
+        ''' Serialize model to JSON message '''
+        import torch # pylint: disable=import-outside-toplevel,import-error
+        json_graph = _Graph(self.metadata, self.hierarchy, '', self.subgraphs).to_json()
+        root = self.hierarchy.summary('')
+        json_metadata = [ { 'name': key, 'value': value } for key, value in root.items() ]
+        if self.hierarchy.capture:
+            json_metadata.extend(self.hierarchy.capture.to_json(''))
+        json_model = {
+            'signature': 'netron:pytorch',
+            'format': 'PyTorch v' + torch.__version__,
+            'metadata': json_metadata,
+            'graphs': [ json_graph ]
+        }
+        return json_model
+
+class _Hierarchy: # pylint: disable=too-few-public-methods
+    ''' Module tree built from a single walk over named_modules() '''
+
+    def __init__(self, model):
+        self.modules = {}
+        self.children = {}
+        for name, module in model.named_modules():
+            self.modules[name] = module
+            self.children[name] = []
+            if name:
+                parent = name.rsplit('.', 1)[0] if '.' in name else ''
+                self.children[parent].append(name)
+        self.summaries = {}
+        self.owners = None
+        self.capture = None
+
+    def summary(self, name):
+        ''' Parameter and buffer totals of a module, computed when its node is first serialized
+
+        Totals build bottom-up from the tensors a module holds directly and the totals of its
+        children. A tensor shared between modules counts only for the first module holding it.
+        '''
+        if name not in self.summaries:
+            if self.owners is None:
+                self.owners = {}
+                for key, module in self.modules.items():
+                    tensors = list(module.parameters(False)) + list(module.buffers(False))
+                    for tensor in tensors:
+                        self.owners.setdefault(id(tensor), key)
+            module = self.modules[name]
+            summary = { 'parameters': 0, 'parameter_bytes': 0, 'buffers': 0, 'buffer_bytes': 0 }
+            tensors = [
+                ('parameters', 'parameter_bytes', module.parameters(False)),
+                ('buffers', 'buffer_bytes', module.buffers(False))
+            ]
+            for count, size, iterator in tensors:
+                for tensor in iterator:
+                    if self.owners.get(id(tensor), None) == name:
+                        elements = tensor.numel()
+                        summary[count] += elements
+                        summary[size] += elements * tensor.element_size()
+            for child in self.children[name]:
+                for key, value in self.summary(child).items():
+                    summary[key] += value
+            self.summaries[name] = summary
+        return self.summaries[name]
+
+class _Graph: # pylint: disable=too-few-public-methods
+
+    def __init__(self, metadata, hierarchy, name, subgraphs):
+        self.metadata = metadata
+        self.hierarchy = hierarchy
+        self.name = name
+        self.subgraphs = subgraphs
+
+    def to_json(self): # pylint: disable=missing-function-docstring
+        import torch # pylint: disable=import-outside-toplevel,import-error
+        json_graph = { 'arguments': [], 'nodes': [], 'inputs': [], 'outputs': [] }
+        def argument(name, tensor):
+            json_argument = { 'name': name }
+            json_type = _tensor_type(tensor)
+            if json_type:
+                json_argument['type'] = json_type
+            if isinstance(tensor, torch.Tensor):
+                json_argument['initializer'] = { 'bytes': tensor.numel() * tensor.element_size() }
+            json_graph['arguments'].append(json_argument)
+            return len(json_graph['arguments']) - 1
+        for name in self.hierarchy.children[self.name]:
+            module = self.hierarchy.modules[name]
+            module_type = type(module).__module__ + '.' + type(module).__name__
+            schema = self.metadata.types.get(module_type, None)
+            json_node = {
+                'type': {
+                    'name': type(module).__name__,
+                    'category': schema['category'] if schema and 'category' in schema else ''
+                },
+                'name': name,
+                'inputs': [],
+                'outputs': [],
+                'attributes': []
+            }
+            tensors = list(module.named_parameters(recurse=False)) + \
+                list(module.named_buffers(recurse=False))
+            for key, tensor in tensors:
+                json_node['inputs'].append({
+                    'name': key,
+                    'arguments': [ argument(name + '.' + key, tensor) ]
+                })
+            extra = module.extra_repr()
+            if extra:
+                json_node['attributes'].append({ 'name': 'extra_repr', 'value': extra })
+            if self.hierarchy.children[name]:
+                index = self.subgraphs.add(None, name, self._callback(name))
+                json_node['attributes'].append({
+                    'name': 'graph',
+                    'type': 'graph',
+                    'value': { 'name': name, 'reference': 'graphs/' + str(index) }
+                })
+            summary = self.hierarchy.summary(name)
+            json_node['metadata'] = [ { 'name': k, 'value': v } for k, v in summary.items() ]
+            if self.hierarchy.capture:
+                json_node['metadata'].extend(self.hierarchy.capture.to_json(name))
+            json_graph['nodes'].append(json_node)
+        return json_graph
+
+    def _callback(self, name):
+        return lambda: _Graph(self.metadata, self.hierarchy, name, self.subgraphs).to_json()
+
+class _Capture: # pylint: disable=too-many-instance-attributes
+    ''' Shapes, data types, wall time and memory recorded by forward hooks.
+    Output activation bytes are recorded on any device, allocator deltas only on CUDA. '''
+
+    _calls, _time, _memory, _peak, _activations = range(5)
+    _size = 5
+
+    def __init__(self, hierarchy):
+        self.names = list(hierarchy.modules.keys())
+        self.modules = hierarchy.modules
+        self.indices = { name: i for i, name in enumerate(self.names) }
+        count = len(self.names)
+        self.buffer = [ 0 ] * (count * self._size)
+        self.inputs = [ None ] * count
+        self.outputs = [ None ] * count
+        self.stack = []
+        self.cuda = False
+
+    def _allocated(self):
+        import torch # pylint: disable=import-outside-toplevel,import-error
+        if not self.cuda:
+            return 0
+        torch.cuda.synchronize()
+        return torch.cuda.memory_allocated()
+
+    def _pre_hook(self, index):
+        import torch # pylint: disable=import-outside-toplevel,import-error
+        def hook(_, args):
+            if self.inputs[index] is None:
+                self.inputs[index] = _types(args)
+            if self.cuda and self.stack:
+                parent = self.stack[-1]
+                parent[3] = max(parent[3], torch.cuda.max_memory_allocated())
+            memory = self._allocated()
+            if self.cuda:
+                torch.cuda.reset_peak_memory_stats()
+            self.stack.append([ index, time.perf_counter_ns(), memory, memory ])
+        return hook
+
+    def _hook(self, index):
+        import torch # pylint: disable=import-outside-toplevel,import-error
+        def hook(_, args, output): # pylint: disable=unused-argument
+            memory = self._allocated()
+            elapsed = time.perf_counter_ns()
+            _, start, before, peak = self.stack.pop()
+            if self.cuda:
+                peak = max(peak, torch.cuda.max_memory_allocated())
+                if self.stack:
+                    self.stack[-1][3] = max(self.stack[-1][3], peak)
+            if self.outputs[index] is None:
+                self.outputs[index] = _types(output)
+            offset = index * self._size
+            buffer = self.buffer
+            buffer[offset + self._calls] += 1
+            buffer[offset + self._time] += elapsed - start
+            buffer[offset + self._memory] += memory - before
+            buffer[offset + self._peak] = max(buffer[offset + self._peak], peak - before)
+            activations = _bytes(output)
+            buffer[offset + self._activations] = \
+                max(buffer[offset + self._activations], activations)
+        return hook
+
+    def run(self, model, inputs): # pylint: disable=missing-function-docstring
+        import torch # pylint: disable=import-outside-toplevel,import-error
+        parameter = next(model.parameters(), None)
+        self.cuda = parameter is not None and parameter.device.type == 'cuda'
+        handles = []
+        modes = [ (module, module.training) for module in self.modules.values() ]
+        model.eval()
+        try:
+            for name, index in self.indices.items():
+                module = self.modules[name]
+                handles.append(module.register_forward_pre_hook(self._pre_hook(index)))
+                handles.append(module.register_forward_hook(self._hook(index)))
+            with torch.no_grad():
+                if isinstance(inputs, dict):
+                    model(**inputs)
+                elif isinstance(inputs, (list, tuple)):
+                    model(*inputs)
+                else:
+                    model(inputs)
+        finally:
+            for handle in handles:
+                handle.remove()
+            self.stack.clear()
+            for module, training in modes:
+                module.training = training
+
+    def to_json(self, name):
+        ''' Serialize captured values of a module as metadata entries '''
+        index = self.indices[name]
+        offset = index * self._size
+        calls = self.buffer[offset + self._calls]
+        if calls == 0:
+            return []
+        json_metadata = [
+            { 'name': 'calls', 'value': calls },
+            { 'name': 'time_ms', 'value': self.buffer[offset + self._time] / 1e6 }
+        ]
+        if self.cuda:
+            memory = self.buffer[offset + self._memory]
+            peak = self.buffer[offset + self._peak]
+            json_metadata.append({ 'name': 'memory_delta', 'value': memory })
+            json_metadata.append({ 'name': 'peak_memory_delta', 'value': peak })
+        activations = self.buffer[offset + self._activations]
+        json_metadata.append({ 'name': 'activation_bytes', 'value': activations })
+        json_metadata.append({ 'name': 'inputs', 'value': self.inputs[index] })
+        json_metadata.append({ 'name': 'outputs', 'value': self.outputs[index] })
+        return json_metadata
+
+def _types(value):
+    import torch # pylint: disable=import-outside-toplevel,import-error
+    if isinstance(value, torch.Tensor):
+        data_type = str(value.dtype).rsplit('.', maxsplit=1)[-1]
+        return data_type + '[' + ','.join(str(_) for _ in value.shape) + ']'
+    if isinstance(value, (list, tuple)):
+        return [ _types(_) for _ in value ]
+    if isinstance(value, dict):
+        return { str(key): _types(item) for key, item in value.items() }
+    return None if value is None else type(value).__name__
+
+def _bytes(value):
+    import torch # pylint: disable=import-outside-toplevel,import-error
+    if isinstance(value, torch.Tensor):
+        return value.nelement() * value.element_size()
+    if isinstance(value, (list, tuple)):
+        return sum(_bytes(_) for _ in value)
+    if isinstance(value, dict):
+        return sum(_bytes(_) for _ in value.values())
+    return 0
+
+def _tensor_type(value):
+    import torch # pylint: disable=import-outside-toplevel,import-error
+    if not isinstance(value, torch.Tensor):
+        return None
+    data_type = str(value.dtype).rsplit('.', maxsplit=1)[-1]
+    data_type = { 'bool': 'boolean' }.get(data_type, data_type)
+    return { 'dataType': data_type, 'shape': { 'dimensions': list(value.shape) } }
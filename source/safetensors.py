@@ -0,0 +1,187 @@
+''' safetensors backend '''
+
+import json
+import mmap
+import os
+import struct
+
+from . import analysis
+
+class ModelFactory: # pylint: disable=too-few-public-methods
+    ''' safetensors backend model factory '''
+    def open(self, path): # pylint: disable=missing-function-docstring
+        return _Model(path)
+
+class _Model:
+    def __init__(self, path):
+        self.files = {}
+        self.tensors = {}
+        self.metadata = {}
+        self.format = 'safetensors'
+        if path.endswith('.json'):
+            with open(path, 'r', encoding='utf-8') as handle:
+                index = json.load(handle)
+            self.metadata = index.get('metadata', {})
+            directory = os.path.dirname(path)
+            files = []
+            for file in index['weight_map'].values():
+                if file not in files:
+                    files.append(file)
+            for file in files:
+                self._load(os.path.join(directory, file))
+            self.format = 'safetensors (' + str(len(files)) + ' shards)'
+        else:
+            self._load(path)
+        self.subgraphs = analysis.Subgraphs()
+        self.hierarchy = _Hierarchy(self.tensors)
+
+    def _load(self, path):
+        with open(path, 'rb') as handle:
+            # mmap rejects empty files and the header needs at least its 8 byte length
+            if os.fstat(handle.fileno()).st_size < 8:
+                raise ValueError("Invalid safetensors file '" + path + "'.")
+            data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        size, = struct.unpack('<Q', data[0:8])
+        header = json.loads(data[8:8 + size].decode('utf-8'))
+        self.files[path] = data
+        metadata = header.pop('__metadata__', None)
+        if metadata and not self.metadata:
+            self.metadata = metadata
+        for name, value in header.items():
+            begin, end = value['data_offsets']
+            offset = 8 + size + begin
+            self.tensors[name] = (value['dtype'], value['shape'], path, offset, end - begin)
+
+    def subgraph(self, index):
+        ''' Serialize tensor group subgraph on first request '''
+        return self.subgraphs.to_json(index)
+
+    def tensor(self, name, limit=1048576):
+        ''' Sampled statistics read without copying from the mapped tensor data '''
+        if name not in self.tensors:
+            return None
+        import numpy # pylint: disable=import-outside-toplevel,import-error
+        data_type, _, path, offset, length = self.tensors[name]
+        json_tensor = { 'bytes': length }
+        if data_type not in _numpy_types or length == 0:
+            return json_tensor
+        dtype = numpy.dtype(_numpy_types[data_type])
+        value = numpy.frombuffer(self.files[path], dtype, length // dtype.itemsize, offset)
+        if value.size > limit:
+            value = value[::-(-value.size // limit)]
+            json_tensor['sampled'] = int(value.size)
+        if data_type == 'BF16':
+            value = (value.astype(numpy.uint32) << 16).view(numpy.float32)
+        return analysis.statistics(json_tensor, value)
+
+    def to_json(self):
+        ''' Serialize model to JSON message '''
+        root = self.hierarchy.summaries['']
+        json_metadata = [ { 'name': key, 'value': value } for key, value in root.items() ]
+        for key, value in self.metadata.items():
+            json_metadata.append({ 'name': key, 'value': value })
+        json_model = {
+            'signature': 'netron:safetensors',
+            'format': self.format,
+            'metadata': json_metadata,
+            'graphs': [ self._graph('') ]
+        }
+        return json_model
+
+    def _graph(self, prefix):
+        json_graph = { 'arguments': [], 'nodes': [], 'inputs': [], 'outputs': [] }
+        hierarchy = self.hierarchy
+        names = hierarchy.children[prefix]
+        if not prefix and hierarchy.tensors['']:
+            names = [ '' ] + names
+        for name in names:
+            component = name.rsplit('.', 1)[-1] or 'tensors'
+            if component.isdigit() and '.' in name:
+                component = name.rsplit('.', 2)[-2]
+            json_node = {
+                'type': { 'name': component, 'category': '' },
+                'name': name,
+                'inputs': [],
+                'outputs': [],
+                'attributes': []
+            }
+            for tensor in hierarchy.tensors[name]:
+                data_type, shape, _, _, length = self.tensors[tensor]
+                json_node['inputs'].append({
+                    'name': tensor.rsplit('.', 1)[-1],
+                    'arguments': [ len(json_graph['arguments']) ]
+                })
+                json_graph['arguments'].append({
+                    'name': tensor,
+                    'type': {
+                        'dataType': _data_types.get(data_type, data_type.lower()),
+                        'shape': { 'dimensions': shape }
+                    },
+                    'initializer': { 'bytes': length }
+                })
+            if name and hierarchy.children[name]:
+                index = self.subgraphs.add(name, name, self._callback(name))
+                json_node['attributes'].append({
+                    'name': 'graph',
+                    'type': 'graph',
+                    'value': { 'name': name, 'reference': 'graphs/' + str(index) }
+                })
+            if name:
+                summary = hierarchy.summaries[name]
+                json_node['metadata'] = [ { 'name': k, 'value': v } for k, v in summary.items() ]
+            json_graph['nodes'].append(json_node)
+        return json_graph
+
+    def _callback(self, prefix):
+        return lambda: self._graph(prefix)
+
+class _Hierarchy: # pylint: disable=too-few-public-methods
+    ''' Dotted tensor names grouped into nested prefixes with aggregated sizes '''
+
+    def __init__(self, tensors):
+        self.children = { '': [] }
+        self.tensors = { '': [] }
+        self.summaries = { '': { 'tensors': 0, 'parameters': 0, 'bytes': 0 } }
+        for name in sorted(tensors, key=_natural):
+            _, shape, _, _, length = tensors[name]
+            count = 1
+            for dimension in shape:
+                count *= dimension
+            parent = name.rsplit('.', 1)[0] if '.' in name else ''
+            self._group(parent)
+            self.tensors[parent].append(name)
+            group = parent
+            while True:
+                summary = self.summaries[group]
+                summary['tensors'] += 1
+                summary['parameters'] += count
+                summary['bytes'] += length
+                if not group:
+                    break
+                group = group.rsplit('.', 1)[0] if '.' in group else ''
+
+    def _group(self, name):
+        if name in self.children:
+            return
+        parent = name.rsplit('.', 1)[0] if '.' in name else ''
+        self._group(parent)
+        self.children[name] = []
+        self.tensors[name] = []
+        self.summaries[name] = { 'tensors': 0, 'parameters': 0, 'bytes': 0 }
+        self.children[parent].append(name)
+
+def _natural(name):
+    return [ (0, int(_), '') if _.isdigit() else (1, 0, _) for _ in name.split('.') ]
+
+_data_types = {
+    'F64': 'float64', 'F32': 'float32', 'F16': 'float16', 'BF16': 'bfloat16',
+    'I64': 'int64', 'I32': 'int32', 'I16': 'int16', 'I8': 'int8',
+    'U64': 'uint64', 'U32': 'uint32', 'U16': 'uint16', 'U8': 'uint8', 'BOOL': 'boolean',
+    'F8_E4M3': 'float8e4m3fn', 'F8_E5M2': 'float8e5m2'
+}
+
+_numpy_types = {
+    'F64': '<f8', 'F32': '<f4', 'F16': '<f2', 'BF16': '<u2',
+    'I64': '<i8', 'I32': '<i4', 'I16': '<i2', 'I8': 'i1',
+    'U64': '<u8', 'U32': '<u4', 'U16': '<u2', 'U8': 'u1', 'BOOL': '?'
+}
@@ -22,15 +22,16 @@ message.ModelFactory = class {
     }
 
     open(context, match) {
-        return Promise.resolve().then(() => {
-            return new message.Model(match);
+        const metadata = new message.Metadata(context, match.signature);
+        return metadata.load(match.graphs || []).then(() => {
+            return new message.Model(match, context, metadata);
         });
     }
 };
 
 message.Model = class {
 
-    constructor(data) {
+    constructor(data, context, metadata) {
         this._format = data.format || '';
         this._producer = data.producer || '';
         this._version = data.version || '';
@@ -38,7 +39,7 @@ message.Model = class {
         this._metadata = (data.metadata || []).map((entry) => {
             return { name: entry.name, value: entry.value };
         });
-        this._graphs = (data.graphs || []).map((graph) => new message.Graph(graph));
+        this._graphs = (data.graphs || []).map((graph) => new message.Graph(graph, context, metadata));
     }
 
     get format() {
@@ -68,11 +69,36 @@ message.Model = class {
 
 message.Graph = class {
 
-    constructor(data) {
+    constructor(data, context, metadata) {
+        this._context = context;
+        this._metadata = metadata;
+        this._name = data.name || '';
         this._inputs = [];
         this._outputs = [];
         this._nodes = [];
-        const args = data.arguments ? data.arguments.map((argument) => new message.Argument(argument)) : [];
+        this._reference = data.reference || null;
+        if (!this._reference) {
+            this._update(data);
+        }
+    }
+
+    load() {
+        if (!this._reference) {
+            return Promise.resolve(this);
+        }
+        const file = '/data/' + this._context.identifier + '/' + this._reference;
+        return this._context.request(file, 'utf-8', null).then((text) => {
+            const data = JSON.parse(text);
+            return this._metadata.load([ data ]).then(() => {
+                this._reference = null;
+                this._update(data);
+                return this;
+            });
+        });
+    }
+
+    _update(data) {
+        const args = data.arguments ? data.arguments.map((argument) => new message.Argument(argument, this._context)) : [];
         for (const parameter of data.inputs || []) {
             parameter.arguments = parameter.arguments.map((index) => args[index]).filter((argument) => !argument.initializer);
             if (parameter.arguments.filter((argument) => !argument.initializer).length > 0) {
@@ -92,10 +118,14 @@ message.Graph = class {
             for (const parameter of node.outputs || []) {
                 parameter.arguments = parameter.arguments.map((index) => args[index]);
             }
-            this._nodes.push(new message.Node(node));
+            this._nodes.push(new message.Node(node, this._context, this._metadata));
         }
     }
 
+    get name() {
+        return this._name;
+    }
+
     get inputs() {
         return this._inputs;
     }
@@ -131,10 +161,10 @@ message.Parameter = class {
 
 message.Argument = class {
 
-    constructor(data) {
+    constructor(data, context) {
         this._name= data.name || '';
         this._type = data.type ? new message.TensorType(data.type) : null;
-        this._initializer = data.initializer ? new message.Tensor(data.initializer) : null;
+        this._initializer = data.initializer ? new message.Tensor(data.initializer, this._name, context) : null;
     }
 
     get name() {
@@ -155,12 +185,17 @@ message.Argument = class {
 
 message.Node = class {
 
-    constructor(data) {
-        this._type = { name: data.type.name, category: data.type.category };
+    constructor(data, context, metadata) {
+        this._type = Object.assign({}, metadata.type(data.type.name), { name: data.type.name });
+        if (data.type.category) {
+            this._type.category = data.type.category;
+        }
         this._name = data.name;
         this._inputs = (data.inputs || []).map((input) => new message.Parameter(input));
         this._outputs = (data.outputs || []).map((output) => new message.Parameter(output));
-        this._attributes = (data.attributes || []).map((attribute) => new message.Attribute(attribute));
+        this._attributes = (data.attributes || []).map((attribute) => new message.Attribute(attribute, context, metadata));
+        this._metadata = (data.metadata || []).map((attribute) => new message.Attribute(attribute));
+        this._attributes = this._attributes.concat(this._metadata);
     }
 
     get type() {
@@ -182,14 +217,18 @@ message.Node = class {
     get attributes() {
         return this._attributes;
     }
+
+    get metadata() {
+        return this._metadata;
+    }
 };
 
 message.Attribute = class {
 
-    constructor(data) {
+    constructor(data, context, metadata) {
         this._type = data.type || '';
         this._name = data.name;
-        this._value = data.value;
+        this._value = this._type === 'graph' ? new message.Graph(data.value, context, metadata) : data.value;
     }
 
     get name() {
@@ -246,7 +285,65 @@ message.TensorShape = class {
 
 message.Tensor = class {
 
-    constructor() {
+    constructor(data, name, context) {
+        this._data = data;
+        this._name = name;
+        this._context = context;
+    }
+
+    statistics() {
+        // Backends that decode tensors lazily serve statistics from the tensors endpoint
+        if (!this._statistics) {
+            const reference = this._data.reference || 'tensors/' + this._name;
+            const file = '/data/' + this._context.identifier + '/' + reference.split('/').map((item) => encodeURIComponent(item)).join('/');
+            this._statistics = this._data.min !== undefined ? Promise.resolve(this._data) :
+                this._context.request(file, 'utf-8', null).then((text) => JSON.parse(text)).catch(() => this._data);
+        }
+        return this._statistics.then((data) => Object.keys(data).filter((key) => key !== 'reference').map((key) => {
+            return { name: key, value: data[key] };
+        }));
+    }
+};
+
+message.Metadata = class {
+
+    constructor(context, signature) {
+        // Operator schemas are fetched per model from the server metadata bundle endpoint
+        const framework = (signature || '').split(':').pop();
+        this._context = context;
+        this._framework = framework === 'tensorflow' ? 'tf' : framework;
+        this._types = new Map();
+    }
+
+    load(graphs) {
+        const names = new Set();
+        for (const graph of graphs) {
+            for (const node of graph.nodes || []) {
+                if (node.type && node.type.name && !this._types.has(node.type.name)) {
+                    names.add(node.type.name);
+                }
+            }
+        }
+        if (!this._framework || names.size === 0) {
+            return Promise.resolve();
+        }
+        for (const name of names) {
+            this._types.set(name, null);
+        }
+        const file = '/metadata/' + this._framework + '?types=' + encodeURIComponent(Array.from(names).join(','));
+        return this._context.request(file, 'utf-8', null).then((text) => {
+            for (const type of JSON.parse(text)) {
+                if (names.has(type.name)) {
+                    this._types.set(type.name, type);
+                }
+            }
+        }).catch(() => {
+            // Metadata is optional, nodes keep the type name and category from the model
+        });
+    }
+
+    type(name) {
+        return this._types.get(name) || null;
     }
 };
 
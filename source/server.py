@@ -1,20 +1,21 @@
 ''' Python Server implementation '''
 
-import errno
 import http.server
-import importlib.util
 import json
 import os
-import random
 import re
-import socket
 import socketserver
 import sys
 import threading
 import time
-import webbrowser
 import urllib.parse
 
+from . import control
+from .control import stop
+
+# Backends, profiler, webbrowser, socket and random are imported where they are used.
+# stop(), status() and ready() live in control so they do not load http.server.
+
 __version__ = '0.0.0'
 
 class _ContentProvider: # pylint: disable=too-few-public-methods
@@ -22,9 +23,13 @@ class _ContentProvider: # pylint: disable=too-few-public-methods
     base_dir = ''
     base = ''
     title = ''
-    def __init__(self, data, path, file):
+    model = None
+    overlay = None
+    def __init__(self, data, path, file, model=None, overlay=None):
         self.data = data if data else bytearray()
         self.title = os.path.basename(file) if file else ''
+        self.model = model
+        self.overlay = overlay
         if path:
             self.dir = os.path.dirname(path) if os.path.dirname(path) else '.'
             self.base = os.path.basename(path)
@@ -32,6 +37,11 @@ class _ContentProvider: # pylint: disable=too-few-public-methods
         ''' Read content '''
         if path == self.base and self.data:
             return self.data
+        if self.model and path.startswith(self.base + '/'):
+            json_content = self._json(path[len(self.base + '/'):])
+            if json_content is not None:
+                return json.dumps(json_content, indent=4, ensure_ascii=False).encode('utf-8')
+            return None
         base_dir = os.path.realpath(self.dir)
         filename = os.path.normpath(os.path.realpath(base_dir + '/' + path))
         if os.path.commonprefix([ base_dir, filename ]) == base_dir:
@@ -39,9 +49,156 @@ class _ContentProvider: # pylint: disable=too-few-public-methods
                 with open(filename, 'rb') as file:
                     return file.read()
         return None
+    def _json(self, path):
+        if path.startswith('graphs/') and hasattr(self.model, 'subgraph'):
+            index = path[len('graphs/'):]
+            json_graph = self.model.subgraph(int(index)) if index.isdigit() else None
+            if json_graph is not None and self.overlay:
+                json_graph = self.overlay.apply(json_graph, path)
+            return json_graph
+        if path.startswith('tensors/') and hasattr(self.model, 'tensor'):
+            return self.model.tensor(path[len('tensors/'):])
+        return None
+
+class _Assets: # pylint: disable=too-few-public-methods
+    ''' Build manifest of content hashed and precompressed static files '''
+    def __init__(self, base_dir):
+        self.files = {}
+        self.hashed = {}
+        self.cache = {}
+        file = os.path.join(base_dir, 'assets.json')
+        if os.path.exists(file):
+            with open(file, 'r', encoding='utf-8') as handle:
+                self.files = json.load(handle)
+        for path, entry in self.files.items():
+            self.hashed[self.url(path, entry)] = path
+    @staticmethod
+    def url(path, entry):
+        ''' Path with the content hash inserted before the extension '''
+        name, extension = os.path.splitext(path)
+        return name + '.' + entry['hash'] + extension
+    def resolve(self, path):
+        ''' Map a hashed path to the file path, and whether it can be cached forever '''
+        if path[1:] in self.hashed:
+            return '/' + self.hashed[path[1:]], True
+        return path, False
+    def read(self, filename):
+        ''' File content from the warm-up cache, or from disk '''
+        content = self.cache.get(filename)
+        if content is None:
+            with open(filename, 'rb') as file:
+                content = file.read()
+        return content
+    def preload(self, base_dir, path):
+        ''' Cache a static file and its precompressed siblings '''
+        filename = os.path.join(base_dir, path)
+        entry = self.files.get(path, {})
+        for suffix in [ '' ] + [ _ for encoding, _ in _encodings if encoding in entry ]:
+            if os.path.exists(filename + suffix):
+                with open(filename + suffix, 'rb') as file:
+                    self.cache[filename + suffix] = file.read()
+    def meta(self):
+        ''' Hashes of the files the browser host requests by name '''
+        items = [ path + ':' + entry['hash'] for path, entry in self.files.items() \
+            if path.endswith('.js') or path.endswith('.json') ]
+        return '<meta name="assets" content="' + ' '.join(items) + '">'
+
+_encodings = [ ('br', '.br'), ('gzip', '.gz') ]
+
+class _Warmup(threading.Thread):
+    ''' Low priority background loading of backends, metadata and static files '''
+
+    # name: (framework module, backend module, browser module, metadata file)
+    targets = {
+        'onnx': ('onnx', '.onnx', 'onnx', 'onnx'),
+        'pytorch': ('torch', '.pytorch', 'pytorch', 'pytorch'),
+        'tensorflow': ('tensorflow', '.tensorflow', 'tf', 'tf'),
+        'keras': ('keras', '.keras', 'keras', 'keras'),
+        'sklearn': ('sklearn', '.sklearn', 'sklearn', 'sklearn'),
+        'assets': None
+    }
+
+    # Files loaded by index.html and the browser host before any model is opened
+    files = [
+        'index.html', 'index.js', 'grapher.css', 'base.js', 'text.js', 'flatbuffers.js',
+        'flexbuffers.js', 'zip.js', 'tar.js', 'python.js', 'dagre.js', 'json.js', 'xml.js',
+        'protobuf.js', 'hdf5.js', 'grapher.js', 'view.js'
+    ]
+
+    def __init__(self, targets, assets, verbosity):
+        threading.Thread.__init__(self, name='netron-warmup', daemon=True)
+        self.assets = assets
+        self.verbosity = verbosity
+        self.state = dict((_, 'pending') for _ in targets)
+        self.durations = {}
+        self.done = threading.Event()
+
+    def run(self):
+        import importlib # pylint: disable=import-outside-toplevel
+        # Only Linux applies a process priority to the calling thread alone
+        if sys.platform.startswith('linux'):
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+            except (AttributeError, OSError):
+                pass
+        base_dir = os.path.dirname(os.path.realpath(__file__))
+        for name in self.state:
+            started = time.perf_counter()
+            try:
+                target = self.targets[name]
+                if target is None:
+                    for path in self.assets_files():
+                        self.assets.preload(base_dir, path)
+                else:
+                    importlib.import_module(target[0])
+                    module = importlib.import_module(target[1], package=__package__)
+                    module.ModelFactory.metadata()
+                    from . import metadata # pylint: disable=import-outside-toplevel
+                    metadata.Bundle.open(base_dir, target[3])
+                    self.assets.preload(base_dir, target[2] + '.js')
+                    self.assets.preload(base_dir, target[3] + '-metadata.json')
+                self.state[name] = 'ready'
+            except ImportError:
+                self.state[name] = 'unavailable'
+            except Exception as error: # pylint: disable=broad-exception-caught
+                self.state[name] = 'failed'
+                _log(self.verbosity > 0, 'Warm-up ' + name + ' error: ' + str(error) + '\n')
+            self.durations[name] = time.perf_counter() - started
+            _log(self.verbosity > 1, 'Warm-up ' + name + ' ' + self.state[name] + ' ' + \
+                f'{self.durations[name]:.2f}' + 's\n')
+        self.done.set()
+
+    def assets_files(self):
+        ''' Core static files, with the CSS and fonts listed in the asset manifest '''
+        files = list(self.files)
+        files.extend(_ for _ in self.assets.files if _.endswith('.css') or _.endswith('.ttf'))
+        return files
+
+    def ready(self):
+        ''' Check whether all targets finished loading '''
+        return self.done.is_set()
+
+    def metrics(self):
+        ''' Warm-up state in Prometheus text format '''
+        lines = [
+            '# TYPE netron_warmup_ready gauge',
+            'netron_warmup_ready ' + ('1' if self.ready() else '0'),
+            '# TYPE netron_warmup_target_ready gauge'
+        ]
+        for name, state in self.state.items():
+            value = '1' if state == 'ready' else '0'
+            lines.append('netron_warmup_target_ready{target="' + name + '",state="' + \
+                state + '"} ' + value)
+        lines.append('# TYPE netron_warmup_seconds gauge')
+        for name, duration in self.durations.items():
+            lines.append('netron_warmup_seconds{target="' + name + '"} ' + f'{duration:.6f}')
+        return lines
 
 class _HTTPRequestHandler(http.server.BaseHTTPRequestHandler):
     content = None
+    assets = None
+    warmup = None
+    started = 0
     verbosity = 1
     mime_types = {
         '.html': 'text/html',
@@ -65,47 +222,101 @@ class _HTTPRequestHandler(http.server.BaseHTTPRequestHandler):
         self.do_GET()
     def do_GET(self): # pylint: disable=invalid-name
         ''' Serve a GET request '''
-        path = urllib.parse.urlparse(self.path).path
-        path = '/index.html' if path == '/' else path
+        url = urllib.parse.urlparse(self.path)
+        path = '/index.html' if url.path == '/' else url.path
         status_code = 404
         content = None
         content_type = None
+        headers = {}
         if path.startswith('/data/'):
             path = urllib.parse.unquote(path[len('/data/'):])
             content = self.content.read(path)
             if content:
                 content_type = 'application/octet-stream'
                 status_code = 200
-        else:
-            base_dir = os.path.dirname(os.path.realpath(__file__))
-            filename = os.path.normpath(os.path.realpath(base_dir + path))
-            extension = os.path.splitext(filename)[1]
-            if os.path.commonprefix([base_dir, filename]) == base_dir and \
-                os.path.exists(filename) and not os.path.isdir(filename) and \
-                extension in self.mime_types:
-                content_type = self.mime_types[extension]
-                with open(filename, 'rb') as file:
-                    content = file.read()
-                if path == '/index.html':
-                    content = content.decode('utf-8')
-                    meta = [
-                        '<meta name="type" content="Python">',
-                        '<meta name="version" content="' + __version__ + '">'
-                    ]
-                    if self.content.base:
-                        meta.append('<meta name="file" content="/data/' + self.content.base + '">')
-                        content = re.sub(r'<title>.*</title>', \
-                            '<title>' + self.content.title + '</title>', content)
-                    meta = '\n'.join(meta)
-                    content = re.sub(r'<meta name="version" content=".*">', meta, content)
-                    content = content.encode('utf-8')
+        elif path == '/metrics':
+            content = self._metrics()
+            content_type = 'text/plain; version=0.0.4'
+            status_code = 200
+        elif path.startswith('/metadata/') and '.' not in path:
+            content = self._metadata(path[len('/metadata/'):], url.query)
+            if content:
+                content_type = 'application/json'
                 status_code = 200
+        else:
+            status_code, content_type, content = self._static(path, headers)
         _log(self.verbosity > 1, str(status_code) + ' ' + self.command + ' ' + self.path + '\n')
-        self._write(status_code, content_type, content)
+        self._write(status_code, content_type, content, headers)
     def log_message(self, format, *args): # pylint: disable=redefined-builtin
         return
-    def _write(self, status_code, content_type, content):
+    def _metrics(self):
+        lines = [
+            '# TYPE netron_uptime_seconds gauge',
+            'netron_uptime_seconds ' + f'{time.time() - self.started:.3f}'
+        ]
+        if self.warmup:
+            lines.extend(self.warmup.metrics())
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+    def _metadata(self, framework, query):
+        from . import metadata # pylint: disable=import-outside-toplevel
+        base_dir = os.path.dirname(os.path.realpath(__file__))
+        bundle = metadata.Bundle.open(base_dir, framework)
+        if not bundle:
+            return None
+        query = urllib.parse.parse_qs(query)
+        names = [ _ for value in query.get('types', []) for _ in value.split(',') ]
+        return bundle.read(names)
+    def _static(self, path, headers):
+        base_dir = os.path.dirname(os.path.realpath(__file__))
+        path, immutable = self.assets.resolve(path)
+        filename = os.path.normpath(os.path.realpath(base_dir + path))
+        extension = os.path.splitext(filename)[1]
+        if os.path.commonprefix([base_dir, filename]) != base_dir or \
+            not os.path.exists(filename) or os.path.isdir(filename) or \
+            extension not in self.mime_types:
+            return 404, None, None
+        status_code = 200
+        entry = self.assets.files.get(path[1:])
+        if entry:
+            etag = '"' + entry['hash'] + '"'
+            headers['ETag'] = etag
+            headers['Cache-Control'] = \
+                'public, max-age=31536000, immutable' if immutable else 'no-cache'
+            if self.headers.get('If-None-Match') == etag:
+                status_code = 304
+            accept = self.headers.get('Accept-Encoding', '')
+            for encoding, suffix in _encodings:
+                if encoding in entry and encoding in accept:
+                    filename = filename + suffix
+                    headers['Content-Encoding'] = encoding
+                    break
+            headers['Vary'] = 'Accept-Encoding'
+        content = self.assets.read(filename) if status_code == 200 else None
+        if path == '/index.html' and content is not None:
+            content = self._index(content.decode('utf-8')).encode('utf-8')
+        return status_code, self.mime_types[extension], content
+    def _index(self, content):
+        meta = [
+            '<meta name="type" content="Python">',
+            '<meta name="version" content="' + __version__ + '">'
+        ]
+        if self.content.base:
+            meta.append('<meta name="file" content="/data/' + self.content.base + '">')
+            content = re.sub(r'<title>.*</title>', \
+                '<title>' + self.content.title + '</title>', content)
+        if self.assets.files:
+            meta.append(self.assets.meta())
+            content = re.sub(r'(src|href)="([^":/]*)"', self._asset, content)
+        meta = '\n'.join(meta)
+        return re.sub(r'<meta name="version" content=".*">', meta, content)
+    def _asset(self, match):
+        entry = self.assets.files.get(match.group(2))
+        path = _Assets.url(match.group(2), entry) if entry else match.group(2)
+        return match.group(1) + '="' + path + '"'
+    def _write(self, status_code, content_type, content, headers=None):
         self.send_response(status_code)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
         if content:
             self.send_header('Content-Type', content_type)
             self.send_header('Content-Length', len(content))
@@ -119,16 +330,24 @@ class _HTTPRequestHandler(http.server.BaseHTTPRequestHandler):
 class _ThreadedHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
     pass
 
-class _HTTPServerThread(threading.Thread):
-    def __init__(self, content, address, verbosity):
-        threading.Thread.__init__(self)
+class _HTTPServerThread(control.ServerThread):
+    def __init__(self, content, address, verbosity, warmup=None):
+        control.ServerThread.__init__(self)
         self.verbosity = verbosity
         self.address = address
         self.url = 'http://' + address[0] + ':' + str(address[1])
         self.server = _ThreadedHTTPServer(address, _HTTPRequestHandler)
         self.server.timeout = 0.25
         self.server.RequestHandlerClass.content = content
+        self.server.RequestHandlerClass.assets = \
+            _Assets(os.path.dirname(os.path.realpath(__file__)))
         self.server.RequestHandlerClass.verbosity = verbosity
+        self.server.RequestHandlerClass.started = time.time()
+        self.warmup = None
+        if warmup:
+            assets = self.server.RequestHandlerClass.assets
+            self.warmup = _Warmup(warmup, assets, verbosity)
+        self.server.RequestHandlerClass.warmup = self.warmup
         self.terminate_event = threading.Event()
         self.terminate_event.set()
         self.stop_event = threading.Event()
@@ -158,12 +377,24 @@ class _HTTPServerThread(threading.Thread):
         return value
 
 def _open(data):
+    import importlib # pylint: disable=import-outside-toplevel
     registry = dict([
         ('onnx.onnx_ml_pb2.ModelProto', '.onnx'),
         ('torch.jit._script.ScriptModule', '.pytorch'),
+        ('torch.fx.graph_module.GraphModule', '.pytorch_fx'),
+        ('torch.export.exported_program.ExportedProgram', '.pytorch_fx'),
         ('torch.Graph', '.pytorch'),
         ('torch._C.Graph', '.pytorch'),
-        ('torch.nn.modules.module.Module', '.pytorch')
+        ('torch.nn.modules.module.Module', '.pytorch_module'),
+        ('keras.src.models.model.Model', '.keras'),
+        ('keras.src.engine.training.Model', '.keras'),
+        ('keras.engine.training.Model', '.keras'),
+        ('tf_keras.src.engine.training.Model', '.keras'),
+        ('sklearn.base.BaseEstimator', '.sklearn'),
+        ('tensorflow.python.framework.ops.Graph', '.tensorflow'),
+        ('tensorflow.core.framework.graph_pb2.GraphDef', '.tensorflow'),
+        ('tensorflow.core.protobuf.meta_graph_pb2.MetaGraphDef', '.tensorflow'),
+        ('tensorflow.core.protobuf.saved_model_pb2.SavedModel', '.tensorflow')
     ])
     queue = [ data.__class__ ]
     while len(queue) > 0:
@@ -178,43 +409,37 @@ def _open(data):
         queue.extend(_ for _ in current.__bases__ if isinstance(_, type))
     return None
 
-def _threads(address=None):
-    threads = [ _ for _ in threading.enumerate() if isinstance(_, _HTTPServerThread) and _.alive() ]
-    if address is not None:
-        address = _make_address(address)
-        threads = [ _ for _ in threads if address[0] == _.address[0] ]
-        if address[1]:
-            threads = [ _ for _ in threads if address[1] == _.address[1] ]
-    return threads
+def _open_file(file):
+    import importlib # pylint: disable=import-outside-toplevel
+    registry = [
+        ('.safetensors', '.safetensors'),
+        ('.safetensors.index.json', '.safetensors')
+    ]
+    for extension, module_name in registry:
+        if file.endswith(extension):
+            module = importlib.import_module(module_name, package=__package__)
+            return module.ModelFactory().open(file)
+    return None
 
 def _log(condition, message):
     if condition:
         sys.stdout.write(message)
         sys.stdout.flush()
 
-def _make_address(address):
-    if address is None or isinstance(address, int):
-        port = address
-        address = ('localhost', port)
-    if isinstance(address, tuple) and len(address) == 2:
-        host = address[0]
-        port = address[1]
-        if isinstance(host, str) and (port is None or isinstance(port, int)):
-            return address
-    raise ValueError('Invalid address.')
-
 def _make_port(address):
     if address[1] is None or address[1] == 0:
         ports = []
         if address[1] != 0:
             ports.append(8080)
             ports.append(8081)
+            import random # pylint: disable=import-outside-toplevel
             rnd = random.Random()
             for _ in range(4):
                 port = rnd.randrange(15000, 25000)
                 if port not in ports:
                     ports.append(port)
         ports.append(0)
+        import socket # pylint: disable=import-outside-toplevel
         for port in ports:
             temp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             temp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -232,35 +457,33 @@ def _make_port(address):
         return address
     raise ValueError('Failed to allocate port.')
 
-def stop(address=None):
-    '''Stop serving model at address.
-
-    Args:
-        address (tuple, optional): A (host, port) tuple, or a port number.
-    '''
-    threads = _threads(address)
-    for thread in threads:
-        thread.stop()
-
-def status(adrress=None):
-    '''Is model served at address.
-
-    Args:
-        address (tuple, optional): A (host, port) tuple, or a port number.
-    '''
-    threads = _threads(adrress)
-    return len(threads) > 0
+def _model_content(model, file, inputs, trace):
+    ''' Serialize a Python backend model with optional runtime capture and trace overlay '''
+    if inputs is not None:
+        if not hasattr(model, 'capture'):
+            raise ValueError('Runtime capture is not supported for this model.')
+        model.capture(inputs)
+    json_model = model.to_json()
+    overlay = None
+    if trace:
+        from . import profiler # pylint: disable=import-outside-toplevel
+        overlay = profiler.Overlay(trace)
+        for i, json_graph in enumerate(json_model['graphs']):
+            overlay.apply(json_graph, 'model/' + str(i))
+    text = json.dumps(json_model, indent=4, ensure_ascii=False)
+    return _ContentProvider(text.encode('utf-8'), 'model.netron', file, model, overlay)
 
 def wait():
     '''Wait for console exit and stop all model servers.'''
     try:
-        while len(_threads()) > 0:
+        while len(control.threads()) > 0:
             time.sleep(0.1)
     except (KeyboardInterrupt, SystemExit):
         _log(True, '\n')
         stop()
 
-def serve(file, data, address=None, browse=False, verbosity=1):
+def serve(file, data, address=None, browse=False, verbosity=1, *, # pylint: disable=too-many-arguments
+    inputs=None, trace=None, warmup=None):
     '''Start serving model from file or data buffer at address and open in web browser.
 
     Args:
@@ -269,42 +492,61 @@ def serve(file, data, address=None, browse=False, verbosity=1):
         address (tuple, optional): A (host, port) tuple, or a port number.
         browse (bool, optional): Launch web browser. Default: True
         log (bool, optional): Log details to console. Default: False
+        inputs (object, optional): Example batch run once through an eager PyTorch
+            module to capture shapes, timings and memory. Default: None
+        trace (string, optional): Chrome trace JSON file from torch.profiler or ONNX Runtime
+            to overlay per-operator latency onto graph nodes. Default: None
+        warmup (bool or list, optional): Load backends, metadata and static files in a low
+            priority background thread once serving. True for all, or names out of 'onnx',
+            'pytorch', 'tensorflow', 'keras', 'sklearn' and 'assets'. Default: None
 
     Returns:
         A (host, port) address tuple.
     '''
     verbosity = { '0': 0, 'quiet': 0, '1': 1, 'default': 1, '2': 2, 'debug': 2 }[str(verbosity)]
 
+    if warmup is True:
+        warmup = list(_Warmup.targets)
+    for name in warmup or []:
+        if name not in _Warmup.targets:
+            raise ValueError("Unsupported warm-up target '" + name + "'.")
+
     if not data and file and not os.path.exists(file):
+        import errno # pylint: disable=import-outside-toplevel
         raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), file)
 
     content = _ContentProvider(data, file, file)
 
+    model = None
     if data and not isinstance(data, bytearray) and isinstance(data.__class__, type):
         _log(verbosity > 1, 'Experimental\n')
         model = _open(data)
-        if model:
-            text = json.dumps(model.to_json(), indent=4, ensure_ascii=False)
-            content = _ContentProvider(text.encode('utf-8'), 'model.netron', file)
+    elif not data and file:
+        model = _open_file(file)
+    if model:
+        content = _model_content(model, file, inputs, trace)
 
-    address = _make_address(address)
+    address = control.make_address(address)
     if isinstance(address[1], int) and address[1] != 0:
         stop(address)
     else:
         address = _make_port(address)
 
-    thread = _HTTPServerThread(content, address, verbosity)
+    thread = _HTTPServerThread(content, address, verbosity, warmup)
     thread.start()
     while not thread.alive():
         time.sleep(0.01)
+    if thread.warmup:
+        thread.warmup.start()
     message = (("Serving '" + file + "'") if file else "Serving") + " at " + thread.url + "\n"
     _log(verbosity > 0, message)
     if browse:
+        import webbrowser # pylint: disable=import-outside-toplevel
         webbrowser.open(thread.url)
 
     return address
 
-def start(file=None, address=None, browse=True, verbosity=1):
+def start(file=None, address=None, browse=True, verbosity=1, warmup=None):
     '''Start serving model file at address and open in web browser.
 
     Args:
@@ -312,8 +554,9 @@ def start(file=None, address=None, browse=True, verbosity=1):
         log (bool, optional): Log details to console. Default: False
         browse (bool, optional): Launch web browser, Default: True
         address (tuple, optional): A (host, port) tuple, or a port number.
+        warmup (bool or list, optional): Preload backends and static files in the background.
 
     Returns:
         A (host, port) address tuple.
     '''
-    return serve(file, None, browse=browse, address=address, verbosity=verbosity)
+    return serve(file, None, browse=browse, address=address, verbosity=verbosity, warmup=warmup)
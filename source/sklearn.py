@@ -0,0 +1,202 @@
+''' scikit-learn backend '''
+
+import os
+
+class ModelFactory: # pylint: disable=too-few-public-methods
+    ''' scikit-learn backend model factory '''
+    def open(self, model): # pylint: disable=missing-function-docstring
+        return _Model(ModelFactory.metadata(), model)
+
+    @staticmethod
+    def metadata():
+        ''' Estimator metadata shared by all models opened in this process '''
+        from . import metadata # pylint: disable=import-outside-toplevel
+        return metadata.Types.open(os.path.dirname(__file__), [ ('sklearn', '') ])
+
+class _Model: # pylint: disable=too-few-public-methods
+    def __init__(self, metadata, model):
+        self.metadata = metadata
+        self.value = model
+
+    def to_json(self):
+        ''' Serialize model to JSON message '''
+        graph = _Graph(self.metadata, self.value)
+        json_graph = graph.to_json()
+        version = getattr(self.value, '_sklearn_version', None) or _version()
+        json_model = {
+            'signature': 'netron:sklearn',
+            'format': 'scikit-learn' + (' v' + version if version else ''),
+            'metadata': [
+                { 'name': 'estimators', 'value': len(json_graph['nodes']) },
+                { 'name': 'array_bytes', 'value': graph.bytes }
+            ],
+            'graphs': [ json_graph ]
+        }
+        return json_model
+
+class _Graph: # pylint: disable=too-few-public-methods
+
+    def __init__(self, metadata, value):
+        self.metadata = metadata
+        self.value = value
+        self.bytes = 0
+        self.json_graph = None
+        self.arguments = {}
+
+    def _argument(self, name, value=None):
+        if name not in self.arguments:
+            json_argument = { 'name': name }
+            if value is not None:
+                json_argument['type'] = {
+                    'dataType': _data_type(value.dtype),
+                    'shape': { 'dimensions': list(value.shape) }
+                }
+                json_argument['initializer'] = { 'bytes': value.nbytes }
+                self.bytes += value.nbytes
+            self.arguments[name] = len(self.json_graph['arguments'])
+            self.json_graph['arguments'].append(json_argument)
+        return self.arguments[name]
+
+    def to_json(self):
+        ''' Serialize estimator dataflow with composite estimators expanded inline '''
+        self.json_graph = {
+            'arguments': [],
+            'nodes': [],
+            'inputs': [],
+            'outputs': []
+        }
+        self.json_graph['inputs'].append({
+            'name': 'data',
+            'arguments': [ self._argument('data') ]
+        })
+        outputs = self._process('', '', self.value, [ 'data' ])
+        for output in outputs:
+            self.json_graph['outputs'].append({
+                'name': output,
+                'arguments': [ self._argument(output) ]
+            })
+        return self.json_graph
+
+    def _process(self, group, name, obj, inputs):
+        type_name = _type_name(obj)
+        if type_name == 'sklearn.pipeline.Pipeline':
+            group = _concat(group, name or 'pipeline')
+            for step_name, step in obj.steps:
+                if step is not None and step != 'passthrough':
+                    inputs = self._process(group, step_name, step, inputs)
+            return inputs
+        if type_name in ('sklearn.pipeline.FeatureUnion',
+            'sklearn.compose._column_transformer.ColumnTransformer'):
+            name = _concat(group, name or 'union')
+            self._node(name, obj, inputs, [ name ])
+            transformers = getattr(obj, 'transformers_', None) or \
+                getattr(obj, 'transformers', None) or obj.transformer_list
+            outputs = []
+            for transformer in transformers:
+                if transformer[1] not in ('drop', 'passthrough', None):
+                    outputs.extend(self._process(name, transformer[0], transformer[1], [ name ]))
+                elif transformer[1] == 'passthrough':
+                    outputs.append(name)
+            return outputs
+        name = _concat(group, name)
+        output = name or type(obj).__name__
+        self._node(output, obj, inputs, [ output ])
+        return [ output ]
+
+    def _node(self, name, obj, inputs, outputs):
+        type_name = _type_name(obj)
+        schema = self.metadata.get(type_name, None)
+        json_node = {
+            'type': {
+                'name': type(obj).__name__,
+                'category': schema['category'] if schema and 'category' in schema else ''
+            },
+            'name': name,
+            'inputs': [ { 'name': 'input', 'arguments': list(map(self._argument, inputs)) } ],
+            'outputs': [ { 'name': 'output', 'arguments': list(map(self._argument, outputs)) } ],
+            'attributes': []
+        }
+        for key, value in vars(obj).items():
+            if _is_array(value):
+                json_node['inputs'].append({
+                    'name': key,
+                    'arguments': [ self._argument(name + '.' + key, value) ]
+                })
+            elif key == 'tree_':
+                json_node['attributes'].extend(_tree(value))
+            elif key == 'estimators_' and _trees(value):
+                json_node['attributes'].extend(_ensemble(value))
+            elif isinstance(value, (list, tuple)) and len(value) > 0 and all(map(_is_array, value)):
+                json_node['inputs'].append({
+                    'name': key,
+                    'arguments': [
+                        self._argument(name + '.' + key + '.' + str(i), _)
+                        for i, _ in enumerate(value)
+                    ]
+                })
+            elif not key.startswith('_'):
+                json_node['attributes'].append({ 'name': key, 'value': _value(value) })
+        self.json_graph['nodes'].append(json_node)
+
+def _version():
+    try:
+        import sklearn # pylint: disable=import-outside-toplevel,import-error
+        return sklearn.__version__
+    except ImportError:
+        return None
+
+def _type_name(obj):
+    return type(obj).__module__ + '.' + type(obj).__name__
+
+def _concat(parent, name):
+    return name if not parent else parent + '/' + name if name else parent
+
+def _is_array(value):
+    return hasattr(value, 'dtype') and hasattr(value, 'shape') and hasattr(value, 'nbytes') and \
+        getattr(value.dtype, 'kind', 'O') != 'O'
+
+def _data_type(dtype):
+    name = dtype.name
+    return { 'bool': 'boolean' }.get(name, name)
+
+def _tree(tree):
+    return [
+        { 'name': 'tree_node_count', 'value': int(tree.node_count) },
+        { 'name': 'tree_max_depth', 'value': int(tree.max_depth) },
+        { 'name': 'tree_leaves', 'value': int(tree.n_leaves) }
+    ]
+
+def _trees(value):
+    ''' Flatten fitted tree estimators, including 2D boosting stage arrays '''
+    items = value.ravel().tolist() if hasattr(value, 'ravel') else value
+    if not isinstance(items, (list, tuple)) or len(items) == 0:
+        return None
+    trees = [ getattr(_, 'tree_', None) for _ in items ]
+    return trees if all(_ is not None for _ in trees) else None
+
+def _ensemble(value):
+    trees = _trees(value)
+    nodes = [ int(_.node_count) for _ in trees ]
+    depths = [ int(_.max_depth) for _ in trees ]
+    return [
+        { 'name': 'trees', 'value': len(trees) },
+        { 'name': 'tree_node_count', 'value': sum(nodes) },
+        { 'name': 'tree_max_depth', 'value': max(depths) },
+        { 'name': 'tree_mean_depth', 'value': sum(depths) / len(depths) },
+        { 'name': 'tree_leaves', 'value': sum(int(_.n_leaves) for _ in trees) }
+    ]
+
+def _value(value): # pylint: disable=too-many-return-statements
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)) and len(value) <= 64:
+        return [ _value(_) for _ in value ]
+    if isinstance(value, dict) and len(value) <= 64:
+        return { str(key): _value(item) for key, item in value.items() }
+    if hasattr(value, 'item') and getattr(value, 'shape', None) == ():
+        return value.item()
+    if hasattr(value, 'get_params'):
+        return type(value).__name__
+    if isinstance(value, (list, tuple, dict)):
+        return type(value).__name__ + '(' + str(len(value)) + ')'
+    return str(value)
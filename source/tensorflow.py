@@ -0,0 +1,329 @@
+''' TensorFlow backend '''
+
+import os
+
+from . import analysis
+
+class ModelFactory: # pylint: disable=too-few-public-methods
+    ''' TensorFlow backend model factory '''
+    def open(self, model): # pylint: disable=missing-function-docstring
+        return _Model(ModelFactory.metadata(), model)
+
+    @staticmethod
+    def metadata():
+        ''' Operator metadata shared by all models opened in this process '''
+        from . import metadata # pylint: disable=import-outside-toplevel
+        return metadata.Types.open(os.path.dirname(__file__), [ ('tf', '') ])
+
+class _Model: # pylint: disable=too-many-instance-attributes
+    def __init__(self, metadata, model):
+        self.metadata = metadata
+        self.format = 'TensorFlow Graph'
+        self.signature = None
+        if hasattr(model, 'meta_graphs'):
+            self.format = 'TensorFlow SavedModel'
+            model = model.meta_graphs[0]
+        if hasattr(model, 'graph_def'):
+            if self.format == 'TensorFlow Graph':
+                self.format = 'TensorFlow MetaGraph'
+            signatures = model.signature_def
+            if len(signatures) > 0:
+                keys = sorted(signatures)
+                key = 'serving_default' if 'serving_default' in keys else keys[0]
+                self.signature = signatures[key]
+            model = model.graph_def
+        self.shapes = {}
+        if hasattr(model, 'as_graph_def'):
+            for operation in model.get_operations():
+                for i, tensor in enumerate(operation.outputs):
+                    if tensor.shape.rank is not None:
+                        shape = [ _ if _ is not None else '?' for _ in tensor.shape.as_list() ]
+                        self.shapes[operation.name + ':' + str(i)] = shape
+            model = model.as_graph_def()
+        self.graph_def = model
+        self.tensors = {}
+        self.subgraphs = analysis.Subgraphs()
+        self.functions = {}
+        for function in model.library.function:
+            name = function.signature.name
+            self.functions[name] = self.subgraphs.add(name, name, self._callback(function))
+
+    def _callback(self, function):
+        def callback():
+            json_graph = _Graph(self, function.node_def, function).to_json()
+            analysis.memory(json_graph)
+            return json_graph
+        return callback
+
+    def subgraph(self, index):
+        ''' Serialize function library subgraph on first request '''
+        return self.subgraphs.to_json(index)
+
+    def tensor(self, name):
+        ''' Decode a constant tensor payload on request '''
+        if name not in self.tensors:
+            return None
+        import numpy # pylint: disable=import-outside-toplevel,import-error
+        import tensorflow # pylint: disable=import-outside-toplevel,import-error
+        value = tensorflow.make_ndarray(self.tensors[name])
+        json_tensor = { 'bytes': value.nbytes }
+        if value.size > 0 and numpy.issubdtype(value.dtype, numpy.number):
+            analysis.statistics(json_tensor, value)
+        return json_tensor
+
+    def to_json(self):
+        ''' Serialize model to JSON message '''
+        json_graph = _Graph(self, self.graph_def.node, None).to_json()
+        json_metadata = analysis.memory(json_graph)
+        versions = self.graph_def.versions
+        if versions.producer:
+            json_metadata.insert(0, { 'name': 'producer', 'value': versions.producer })
+        json_model = {
+            'signature': 'netron:tensorflow',
+            'format': self.format,
+            'metadata': json_metadata,
+            'graphs': [ json_graph ]
+        }
+        return json_model
+
+class _Graph: # pylint: disable=too-few-public-methods
+
+    def __init__(self, model, nodes, function):
+        self.model = model
+        self.metadata = model.metadata
+        self.nodes = nodes
+        self.function = function
+
+    def _key(self, name):
+        if self.function is None and ':' not in name:
+            return name + ':0'
+        return name
+
+    def _outputs(self, node, schema, consumers):
+        parameters = schema.get('outputs', []) if schema else []
+        outputs = []
+        index = 0
+        for parameter in parameters:
+            count = _count(node, parameter)
+            keys = []
+            for i in range(count):
+                if self.function is None:
+                    keys.append(node.name + ':' + str(index))
+                else:
+                    keys.append(node.name + ':' + parameter['name'] + ':' + str(i))
+                index += 1
+            outputs.append((parameter['name'], keys, parameter))
+        known = set(key for _, keys, _ in outputs for key in keys)
+        extra = [ _ for _ in consumers.get(node.name, []) if _ not in known ]
+        if extra or not outputs:
+            outputs.append(('output', extra if extra else [ self._key(node.name) ], None))
+        return outputs
+
+    def to_json(self): # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+        ''' Serialize graph or function body to JSON '''
+        json_graph = { 'arguments': [], 'nodes': [], 'inputs': [], 'outputs': [] }
+        arguments = {}
+        def argument(key, data_type=None, shape=None, tensor=None):
+            if key not in arguments:
+                arguments[key] = len(json_graph['arguments'])
+                json_graph['arguments'].append({ 'name': key })
+            json_argument = json_graph['arguments'][arguments[key]]
+            if data_type is not None and 'type' not in json_argument:
+                json_argument['type'] = { 'dataType': _data_type(data_type) }
+                if shape is not None:
+                    json_argument['type']['shape'] = { 'dimensions': shape }
+            if tensor is not None:
+                # Function bodies reuse node names, so their tensors are scoped by function
+                scope = self.function.signature.name + '/' if self.function is not None else ''
+                self.model.tensors[scope + key] = tensor
+                json_argument['initializer'] = {
+                    'bytes': _tensor_bytes(tensor),
+                    'reference': 'tensors/' + scope + key
+                }
+            return arguments[key]
+
+        consumers = {}
+        for node in self.nodes:
+            for name in node.input:
+                key = self._key(name)
+                if not name.startswith('^') and ':' in key:
+                    keys = consumers.setdefault(key.split(':', 1)[0], [])
+                    if key not in keys:
+                        keys.append(key)
+
+        if self.function is not None:
+            signature = self.function.signature
+            for arg in signature.input_arg:
+                data_type = arg.type if arg.type else None
+                json_graph['inputs'].append({
+                    'name': arg.name,
+                    'arguments': [ argument(arg.name, data_type) ]
+                })
+            for arg in signature.output_arg:
+                if arg.name in self.function.ret:
+                    json_graph['outputs'].append({
+                        'name': arg.name,
+                        'arguments': [ argument(self.function.ret[arg.name]) ]
+                    })
+        elif self.model.signature is not None:
+            for name, info in self.model.signature.outputs.items():
+                json_graph['outputs'].append({
+                    'name': name,
+                    'arguments': [ argument(self._key(info.name)) ]
+                })
+
+        for node in self.nodes:
+            schema = self.metadata.get(node.op, None)
+            shapes = node.attr['_output_shapes'].list.shape if '_output_shapes' in node.attr else []
+            outputs = self._outputs(node, schema, consumers)
+            if node.op == 'Placeholder':
+                shape = _shape(node.attr['shape'].shape) if 'shape' in node.attr else None
+                json_graph['inputs'].append({
+                    'name': node.name,
+                    'arguments': [ argument(outputs[0][1][0], node.attr['dtype'].type, shape) ]
+                })
+                continue
+            json_node = analysis.node(node.op, schema, node.name)
+            inputs = [ _ for _ in node.input if not _.startswith('^') ]
+            position = 0
+            for parameter in schema.get('inputs', []) if schema else []:
+                count = _count(node, parameter)
+                values = inputs[position:position + count]
+                position += count
+                if values:
+                    json_node['inputs'].append({
+                        'name': parameter['name'],
+                        'arguments': [ argument(self._key(_)) for _ in values ]
+                    })
+            for value in inputs[position:]:
+                json_node['inputs'].append({
+                    'name': 'input',
+                    'arguments': [ argument(self._key(value)) ]
+                })
+            controls = [ _[1:] for _ in node.input if _.startswith('^') ]
+            if controls:
+                json_node['inputs'].append({
+                    'name': 'control',
+                    'arguments': [ argument(self._key(_)) for _ in controls ]
+                })
+            index = 0
+            for name, keys, parameter in outputs:
+                values = []
+                for i, key in enumerate(keys):
+                    data_type = _output_type(node, parameter, i)
+                    shape = _shape(shapes[index]) if index < len(shapes) else None
+                    if shape is None and self.function is None:
+                        shape = self.model.shapes.get(key, None)
+                    tensor = None
+                    if node.op == 'Const' and 'value' in node.attr:
+                        tensor = node.attr['value'].tensor
+                        shape = _shape(tensor.tensor_shape)
+                    values.append(argument(key, data_type, shape, tensor))
+                    index += 1
+                json_node['outputs'].append({ 'name': name, 'arguments': values })
+            for name in sorted(node.attr.keys()):
+                if name == '_output_shapes':
+                    continue
+                json_node['attributes'].append(self._attribute(name, node.attr[name]))
+            if node.op in self.model.functions:
+                json_node['attributes'].append(self._function('function', node.op))
+            json_graph['nodes'].append(json_node)
+        return json_graph
+
+    def _function(self, name, function):
+        return {
+            'name': name,
+            'type': 'graph',
+            'value': {
+                'name': function,
+                'reference': 'graphs/' + str(self.model.functions[function])
+            }
+        }
+
+    def _attribute(self, name, value):
+        kind = value.WhichOneof('value')
+        if kind == 'func' and value.func.name in self.model.functions:
+            return self._function(name, value.func.name)
+        return { 'name': name, 'value': _attribute_value(value, kind) }
+
+_data_types = {
+    1: 'float32', 2: 'float64', 3: 'int32', 4: 'uint8', 5: 'int16', 6: 'int8', 7: 'string',
+    8: 'complex64', 9: 'int64', 10: 'boolean', 11: 'qint8', 12: 'quint8', 13: 'qint32',
+    14: 'bfloat16', 15: 'qint16', 16: 'quint16', 17: 'uint16', 18: 'complex128', 19: 'float16',
+    20: 'resource', 21: 'variant', 22: 'uint32', 23: 'uint64'
+}
+
+def _data_type(value):
+    value = value - 100 if value > 100 else value
+    return _data_types.get(value, '?')
+
+def _shape(value):
+    if value.unknown_rank:
+        return None
+    return [ _.size if _.size >= 0 else '?' for _ in value.dim ]
+
+def _count(node, parameter):
+    if 'numberAttr' in parameter:
+        return node.attr[parameter['numberAttr']].i if parameter['numberAttr'] in node.attr else 0
+    if 'typeListAttr' in parameter:
+        attr = parameter['typeListAttr']
+        return len(node.attr[attr].list.type) if attr in node.attr else 0
+    return 1
+
+def _output_type(node, parameter, index):
+    if parameter is None:
+        return None
+    if 'type' in parameter:
+        return parameter['type']
+    if 'typeAttr' in parameter and parameter['typeAttr'] in node.attr:
+        return node.attr[parameter['typeAttr']].type
+    if 'typeListAttr' in parameter and parameter['typeListAttr'] in node.attr:
+        types = node.attr[parameter['typeListAttr']].list.type
+        return types[index] if index < len(types) else None
+    return None
+
+def _tensor_bytes(tensor):
+    if tensor.tensor_content:
+        return len(tensor.tensor_content)
+    count = 1
+    for dim in tensor.tensor_shape.dim:
+        count *= max(dim.size, 0)
+    size = analysis.size({
+        'type': { 'dataType': _data_type(tensor.dtype), 'shape': { 'dimensions': [ count ] } }
+    })
+    return size if size >= 0 else 0
+
+def _attribute_value(value, kind): # pylint: disable=too-many-return-statements,too-many-branches
+    if kind == 's':
+        return value.s.decode('utf-8', errors='replace')
+    if kind in ('i', 'f', 'b'):
+        return getattr(value, kind)
+    if kind == 'type':
+        return _data_type(value.type)
+    if kind == 'shape':
+        return _shape(value.shape)
+    if kind == 'tensor':
+        shape = _shape(value.tensor.tensor_shape) or []
+        return _data_type(value.tensor.dtype) + '[' + ','.join(str(_) for _ in shape) + ']'
+    if kind == 'func':
+        return value.func.name
+    if kind == 'placeholder':
+        return '$' + value.placeholder
+    if kind == 'list':
+        items = value.list
+        for field in ('s', 'i', 'f', 'b', 'type', 'shape', 'tensor', 'func'):
+            values = getattr(items, field)
+            if len(values) > 0:
+                if field == 's':
+                    return [ _.decode('utf-8', errors='replace') for _ in values ]
+                if field == 'type':
+                    return [ _data_type(_) for _ in values ]
+                if field == 'shape':
+                    return [ _shape(_) for _ in values ]
+                if field == 'tensor':
+                    return [ _data_type(_.dtype) for _ in values ]
+                if field == 'func':
+                    return [ _.name for _ in values ]
+                return list(values)
+        return []
+    return None
@@ -704,7 +704,12 @@ view.View = class {
     pushGraph(graph) {
         if (graph !== this.activeGraph) {
             this._sidebar.close();
-            this._updateGraph(this._model, [ graph ].concat(this._graphs));
+            const load = graph.load ? graph.load() : Promise.resolve(graph);
+            load.then(() => {
+                this._updateGraph(this._model, [ graph ].concat(this._graphs));
+            }).catch((error) => {
+                this.error(error, 'Error loading graph.', null);
+            });
         }
     }
 
@@ -2302,6 +2307,19 @@ view.ValueView = class extends view.Control {
         this._element.appendChild(child);
     }
 
+    _statistics(value) {
+        const valueLine = this._host.document.createElement('div');
+        valueLine.className = 'sidebar-view-item-value-line-border';
+        this._element.appendChild(valueLine);
+        value.statistics().then((entries) => {
+            valueLine.innerHTML = entries.map((entry) => {
+                return '<span class=\'sidebar-view-item-value-line-content\'>' + entry.name + ': <b>' + entry.value + '</b></span>';
+            }).join('<br>');
+        }).catch((err) => {
+            valueLine.innerHTML = err.toString();
+        });
+    }
+
     _tensor(value) {
         const contentLine = this._host.document.createElement('pre');
         try {
@@ -2578,7 +2596,9 @@ view.ArgumentView = class extends view.ValueView {
                     this._bold('location', location);
                 }
 
-                if (initializer) {
+                if (initializer && initializer.statistics) {
+                    this._statistics(initializer);
+                } else if (initializer) {
                     this._tensor(initializer);
                 }
             } else {
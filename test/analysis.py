@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+
+''' Python Server model analysis test '''
+
+import gzip
+import json
+import os
+import struct
+import sys
+import tempfile
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(root_dir)
+sys.pycache_prefix = os.path.join(root_dir, 'dist', 'pycache', 'test', 'analysis')
+
+def _metadata(json_node):
+    return dict((_['name'], _['value']) for _ in json_node.get('metadata', []))
+
+def _test_onnx_cost():
+    numpy = __import__('numpy')
+    onnx = __import__('onnx')
+    helper = onnx.helper
+    float32 = onnx.TensorProto.FLOAT
+    graph = helper.make_graph([
+        helper.make_node('Gemm', [ 'x', 'weight', 'bias' ], [ 'y' ]),
+        helper.make_node('Relu', [ 'y' ], [ 'z' ])
+    ], 'graph', [ helper.make_tensor_value_info('x', float32, [ 4, 32 ]) ],
+    [ helper.make_tensor_value_info('z', float32, [ 4, 6 ]) ], [
+        onnx.numpy_helper.from_array(numpy.zeros((32, 6), numpy.float32), 'weight'),
+        onnx.numpy_helper.from_array(numpy.zeros((6,), numpy.float32), 'bias')
+    ])
+    backend = __import__('source.onnx', fromlist=[ 'ModelFactory' ])
+    model = backend.ModelFactory().open(helper.make_model(graph))
+    json_model = model.to_json()
+    text = json.dumps(json_model)
+    gemm, relu = [ _metadata(_) for _ in json_model['graphs'][0]['nodes'] ]
+    assert gemm['macs'] == 4 * 32 * 6
+    assert gemm['flops'] == 2 * 4 * 32 * 6 + 4 * 6
+    assert gemm['parameter_bytes'] == (32 * 6 + 6) * 4
+    assert relu['flops'] == 4 * 6
+    assert 'parameter_bytes' not in relu
+    assert json.dumps(model.to_json()) == text
+
+def _test_pytorch_capture():
+    torch = __import__('torch')
+    class _Module(torch.nn.Module): # pylint: disable=too-few-public-methods
+        def __init__(self):
+            super().__init__()
+            self.linear = torch.nn.Linear(4, 3)
+            self.relu = torch.nn.ReLU()
+        def forward(self, x): # pylint: disable=missing-function-docstring
+            return self.relu(self.linear(x)) + self.relu(x[:, :3])
+    module = _Module().train()
+    backend = __import__('source.pytorch_module', fromlist=[ 'ModelFactory' ])
+    model = backend.ModelFactory().open(module)
+    model.capture(torch.zeros(2, 4))
+    json_model = model.to_json()
+    linear, relu = [ _metadata(_) for _ in json_model['graphs'][0]['nodes'] ]
+    assert _metadata(json_model)['calls'] == 1
+    assert linear['calls'] == 1
+    assert relu['calls'] == 2
+    assert linear['activation_bytes'] == 2 * 3 * 4
+    assert relu['activation_bytes'] == 2 * 3 * 4
+    assert linear['parameters'] == 4 * 3 + 3
+    assert module.training
+
+def _test_profiler_trace():
+    profiler = __import__('source.profiler', fromlist=[ 'Overlay' ])
+    events = [
+        { 'ph': 'X', 'cat': 'cpu_op', 'name': 'aten::linear', 'ts': 0, 'dur': 10, 'tid': 1 },
+        { 'ph': 'X', 'cat': 'cpu_op', 'name': 'aten::addmm', 'ts': 2, 'dur': 6, 'tid': 1 },
+        { 'ph': 'X', 'cat': 'kernel', 'name': 'void at::native::gemm', 'ts': 3, 'dur': 50 },
+        { 'ph': 'X', 'cat': 'cpu_op', 'name': 'aten::relu', 'ts': 20, 'dur': 5, 'tid': 1 }
+    ]
+    content = json.dumps({ 'traceEvents': events })
+    with tempfile.TemporaryDirectory() as folder:
+        for name, opener in ( ('trace.json', open), ('trace.json.gz', gzip.open) ):
+            path = os.path.join(folder, name)
+            with opener(path, 'wt', encoding='utf-8') as file:
+                file.write(content)
+            overlay = profiler.Overlay(path)
+            assert overlay.total == 15
+            assert 'void at::native::gemm' not in overlay.types
+            json_graph = { 'nodes': [
+                { 'name': 'a', 'type': { 'name': 'aten::linear' } },
+                { 'name': 'b', 'type': { 'name': 'aten::linear' } },
+                { 'name': 'c', 'type': { 'name': 'aten::relu' } }
+            ] }
+            overlay.apply(json_graph, 'model/0')
+            nodes = [ _metadata(_) for _ in json_graph['nodes'] ]
+            assert [ _['profile_op_type_time_us'] for _ in nodes ] == [ 5, 5, 5 ]
+            assert sum(_['profile_op_type_share'] for _ in nodes) <= 1
+
+def _write_safetensors(path, tensors):
+    header = {}
+    offset = 0
+    for name, (data_type, shape, data) in tensors.items():
+        header[name] = {
+            'dtype': data_type,
+            'shape': shape,
+            'data_offsets': [ offset, offset + len(data) ]
+        }
+        offset += len(data)
+    content = json.dumps(header).encode('utf-8')
+    with open(path, 'wb') as file:
+        file.write(struct.pack('<Q', len(content)))
+        file.write(content)
+        for _, _, data in tensors.values():
+            file.write(data)
+
+def _test_safetensors_shards():
+    backend = __import__('source.safetensors', fromlist=[ 'ModelFactory' ])
+    # bfloat16 1.0, 2.0, 0.0 and -4.0 are the upper halves of the float32 values
+    bfloat16 = struct.pack('<4H', 0x3f80, 0x4000, 0x0000, 0xc080)
+    shards = {
+        'model-1.safetensors': { 'layer.0.weight': ('BF16', [ 2, 2 ], bfloat16) },
+        'model-2.safetensors': { 'layer.1.bias': ('F32', [ 2 ], struct.pack('<2f', 1, 3)) }
+    }
+    with tempfile.TemporaryDirectory() as folder:
+        weight_map = {}
+        for file, tensors in shards.items():
+            _write_safetensors(os.path.join(folder, file), tensors)
+            weight_map.update((_, file) for _ in tensors)
+        path = os.path.join(folder, 'model.safetensors.index.json')
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({ 'metadata': {}, 'weight_map': weight_map }, file)
+        model = backend.ModelFactory().open(path)
+        json_model = model.to_json()
+        assert json_model['format'] == 'safetensors (2 shards)'
+        assert _metadata(json_model)['parameters'] == 6
+        assert _metadata(json_model)['bytes'] == 16
+        weight = model.tensor('layer.0.weight')
+        assert weight['bytes'] == 8
+        assert (weight['min'], weight['max'], weight['mean']) == (-4, 2, -0.25)
+        assert weight['sparsity'] == 0.25
+        assert model.tensor('layer.1.bias')['mean'] == 2
+
+_test_onnx_cost()
+_test_pytorch_capture()
+_test_profiler_trace()
+_test_safetensors_shards()
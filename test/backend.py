@@ -40,6 +40,12 @@ def _test_torchscript_transformer():
     torch._C._jit_pass_inline(module.graph) # pylint: disable=protected-access
     netron.serve('transformer', module)
 
+def _test_torchscript_transformer_script():
+    torch = __import__('torch')
+    model = torch.nn.Transformer(nhead=16, num_encoder_layers=12)
+    module = torch.jit.script(model)
+    netron.serve('transformer', module)
+
 def _test_torchscript_resnet34():
     torch = __import__('torch')
     torchvision = __import__('torchvision')
@@ -86,14 +92,64 @@ def _test_torchscript_nnapi():
     torch._C._jit_pass_inline(trace.graph) # pylint: disable=protected-access
     netron.serve('inception_v3', trace)
 
+def _test_pytorch_export():
+    torch = __import__('torch')
+    torchvision = __import__('torchvision')
+    model = torchvision.models.resnet34()
+    program = torch.export.export(model.eval(), (torch.zeros([1, 3, 224, 224]),))
+    netron.serve('resnet34', program)
+
+def _test_pytorch_fx():
+    torch = __import__('torch')
+    model = torch.nn.Transformer(nhead=16, num_encoder_layers=12)
+    module = torch.fx.symbolic_trace(model)
+    netron.serve('transformer', module)
+
+def _test_pytorch_module():
+    torch = __import__('torch')
+    with torch.device('meta'):
+        model = torch.nn.Transformer(d_model=8192, nhead=64, dim_feedforward=28672)
+    netron.serve('transformer', model)
+
+def _test_tensorflow():
+    tf = __import__('tensorflow')
+    model = tf.keras.applications.MobileNetV2(weights=None)
+    function = tf.function(model).get_concrete_function(
+        tf.TensorSpec(model.inputs[0].shape, model.inputs[0].dtype))
+    netron.serve('mobilenet_v2', function.graph)
+
+def _test_keras():
+    keras = __import__('keras')
+    model = keras.applications.ResNet50(weights=None)
+    netron.serve('resnet50', model)
+
+def _test_sklearn():
+    numpy = __import__('numpy')
+    pipeline = __import__('sklearn.pipeline', fromlist=[ 'Pipeline' ])
+    preprocessing = __import__('sklearn.preprocessing', fromlist=[ 'StandardScaler' ])
+    ensemble = __import__('sklearn.ensemble', fromlist=[ 'RandomForestClassifier' ])
+    model = pipeline.Pipeline([
+        ('scaler', preprocessing.StandardScaler()),
+        ('forest', ensemble.RandomForestClassifier(n_estimators=100))
+    ])
+    model.fit(numpy.random.rand(100, 8), numpy.random.randint(0, 2, 100))
+    netron.serve('pipeline', model)
+
 # _test_onnx()
 # _test_onnx_iterate()
 
 # _test_torchscript()
+# _test_torchscript_transformer_script()
 # _test_torchscript_quantized()
 # _test_torchscript_resnet34()
 # _test_torchscript_inception_v3()
 # _test_torchscript_scalar()
 # _test_torchscript_tuple()
 # _test_torchscript_nnapi()
+# _test_pytorch_export()
+# _test_pytorch_fx()
+# _test_pytorch_module()
+# _test_tensorflow()
+# _test_keras()
+# _test_sklearn()
 _test_torchscript_transformer()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+
+''' Python Server import time benchmark '''
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+scenarios = [
+    ('import', 'import source'),
+    ('status', 'import source; source.status()'),
+    ('serve', 'import source; source.stop(source.serve(None, None, verbosity=0))')
+]
+
+def _measure(code):
+    ''' Cumulative microseconds of top-level imports reported by python -X importtime '''
+    args = [ sys.executable, '-X', 'importtime', '-c', code ]
+    process = subprocess.run(args, cwd=root_dir, capture_output=True, text=True, check=True)
+    modules = {}
+    for line in process.stderr.splitlines():
+        fields = line[len('import time:'):].split('|')
+        if line.startswith('import time:') and fields[0].strip().isdigit():
+            name = fields[2].rstrip()
+            if not name.startswith('  '):
+                modules[name.strip()] = int(fields[1])
+    return modules
+
+def _duration(runs, baseline):
+    return statistics.median(sum(value for key, value in _.items() \
+        if key not in baseline) for _ in runs) / 1000
+
+def main(): # pylint: disable=missing-function-docstring
+    parser = argparse.ArgumentParser(description='Measure package import time')
+    parser.add_argument('--repeat', help='runs per scenario', type=int, default=5)
+    parser.add_argument('--threshold', type=float, default=10, \
+        help='maximum milliseconds for the import and status scenarios')
+    args = parser.parse_args()
+    failed = False
+    # Modules imported by interpreter startup alone are not attributed to the package
+    baseline = set(_measure('pass'))
+    for name, code in scenarios:
+        runs = [ _measure(code) for _ in range(args.repeat) ]
+        duration = _duration(runs, baseline)
+        slowest = sorted(runs[-1].items(), key=lambda _: -_[1])
+        slowest = [ _ for _ in slowest if _[0] not in baseline ][0:4]
+        slowest = ', '.join(key + ' ' + f'{value / 1000:.1f}' for key, value in slowest)
+        print(name.ljust(8) + ' ' + f'{duration:8.1f}' + ' ms  ' + slowest)
+        # status() must not pull in http.server, unlike serve()
+        if name in ('import', 'status') and duration > args.threshold:
+            print(name.capitalize() + ' time exceeds ' + str(args.threshold) + ' ms.')
+            failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+''' File helpers shared by the metadata scripts '''
+
+import os
+
+def write(path, content):
+    ''' Write text to a temporary file and rename it into place, so an interrupted script
+    never leaves a partially written output behind '''
+    temp = path + '.tmp'
+    with open(temp, 'w', encoding='utf-8') as file:
+        file.write(content)
+    os.replace(temp, path)
@@ -4,6 +4,7 @@ import json
 import os
 import pydoc
 import re
+import files
 
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 
@@ -187,10 +188,8 @@ def _metadata():
             docstring = _find_docstring(class_name)
             _update_headers(schema, docstring)
 
-    with open(json_path, 'w', encoding='utf-8') as file:
-        content = json.dumps(json_root, sort_keys=False, indent=2)
-        for line in content.splitlines():
-            file.write(line.rstrip() + '\n')
+    content = json.dumps(json_root, sort_keys=False, indent=2)
+    files.write(json_path, ''.join(line.rstrip() + '\n' for line in content.splitlines()))
 
 def main(): # pylint: disable=missing-function-docstring
     _metadata()
@@ -0,0 +1,176 @@
+''' Incremental metadata build driver '''
+
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+third_party_dir = os.path.join(root_dir, 'third_party')
+fingerprint_file = os.path.join(third_party_dir, 'metadata.json')
+
+# name: (script, arguments, virtual environment, packages, imported repository modules,
+#     third_party sources, outputs)
+targets = {
+    'onnx': ('onnx_metadata.py', [], 'onnx', [ 'onnx' ],
+        [ 'tools/files.py', 'source/__init__.py', 'source/metadata.py' ],
+        [],
+        [ 'source/onnx-metadata.json' ]),
+    'tf': ('tf_metadata.py', [], 'tensorflow', [ 'tf-nightly', 'tensorflow', 'protobuf' ],
+        [ 'tools/files.py' ],
+        [ 'source/tensorflow/tensorflow/core/api_def/base_api',
+          'source/tensorflow/tensorflow/core/ops/ops.pbtxt' ],
+        [ 'source/tf-metadata.json' ]),
+    'keras': ('keras_metadata.py', [], 'tensorflow', [ 'tf-nightly', 'tensorflow', 'keras' ],
+        [ 'tools/files.py' ],
+        [],
+        [ 'source/keras-metadata.json' ]),
+    'pytorch': ('pytorch_metadata.py', [], None, [ 'torch' ],
+        [ 'tools/files.py', 'source/__init__.py', 'source/pytorch.py', 'source/analysis.py' ],
+        [ 'source/pytorch/aten/src/ATen/native',
+          'source/pytorch/torch/csrc/jit/runtime',
+          'source/pytorch/caffe2/operators' ],
+        [ 'source/pytorch-metadata.json' ]),
+    'sklearn': ('sklearn_metadata.py', [], 'scikit-learn', [ 'scikit-learn' ],
+        [ 'tools/files.py' ],
+        [],
+        [ 'source/sklearn-metadata.json' ]),
+    'nnabla': ('nnabla_script.py', [ 'metadata' ], 'nnabla', [ 'pyyaml', 'mako' ],
+        [ 'tools/files.py' ],
+        [ 'source/nnabla/build-tools/code_generator/functions.yaml' ],
+        [ 'source/nnabla-metadata.json' ])
+}
+
+_environment = {
+    'onnx': { 'PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION': 'python' },
+    'tf': { 'PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION': 'python' },
+    'sklearn': { 'PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION': 'python' }
+}
+
+_VERSIONS = '''
+import importlib.metadata, json, sys
+versions = {}
+for name in sys.argv[1:]:
+    try:
+        versions[name] = importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        pass
+print(json.dumps(versions))
+'''
+
+def _python(env):
+    if env:
+        folder = os.path.join(third_party_dir, 'env', env)
+        path = os.path.join(folder, 'Scripts', 'python.exe') if os.name == 'nt' else \
+            os.path.join(folder, 'bin', 'python')
+        if os.path.exists(path):
+            return path
+    return sys.executable
+
+def _hash_file(digest, path):
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1048576), b''):
+            digest.update(chunk)
+
+def _hash_path(digest, path):
+    if os.path.isfile(path):
+        _hash_file(digest, path)
+        return
+    if not os.path.isdir(path):
+        digest.update(b'\0missing')
+        return
+    for folder, folders, files in os.walk(path):
+        folders.sort()
+        for name in sorted(files):
+            file = os.path.join(folder, name)
+            digest.update(os.path.relpath(file, path).replace('\\', '/').encode('utf-8') + b'\0')
+            _hash_file(digest, file)
+
+def _fingerprint(name):
+    ''' Hash of the tool script, the repository modules it imports, installed package versions
+    and third_party sources '''
+    script, arguments, env, packages, modules, sources, _ = targets[name]
+    python = _python(env)
+    args = [ python, '-c', _VERSIONS ] + packages
+    versions = subprocess.run(args, capture_output=True, text=True, check=True).stdout
+    digest = hashlib.sha256()
+    digest.update(json.dumps([ script, arguments, json.loads(versions) ]).encode('utf-8'))
+    _hash_path(digest, os.path.join(root_dir, 'tools', script))
+    for module in modules:
+        digest.update(module.encode('utf-8') + b'\0')
+        _hash_path(digest, os.path.join(root_dir, module))
+    for source in sources:
+        digest.update(source.encode('utf-8') + b'\0')
+        _hash_path(digest, os.path.join(third_party_dir, source))
+    return digest.hexdigest()
+
+def _outputs(name):
+    result = {}
+    for output in targets[name][6]:
+        digest = hashlib.sha256()
+        _hash_path(digest, os.path.join(root_dir, output))
+        result[output] = digest.hexdigest()
+    return result
+
+def _run(name, state, force):
+    start = time.perf_counter()
+    fingerprint = _fingerprint(name)
+    entry = state.get(name, {})
+    if not force and entry.get('fingerprint') == fingerprint and \
+        entry.get('outputs') == _outputs(name):
+        return name, 'unchanged', time.perf_counter() - start, entry
+    script, arguments, env, _, _, _, _ = targets[name]
+    args = [ _python(env), os.path.join(root_dir, 'tools', script) ] + arguments
+    environ = dict(os.environ)
+    environ.update(_environment.get(name, {}))
+    process = subprocess.run(args, cwd=root_dir, env=environ,
+        capture_output=True, text=True, check=False)
+    duration = time.perf_counter() - start
+    if process.returncode != 0:
+        return name, 'failed\n' + (process.stderr or process.stdout).rstrip(), duration, entry
+    entry = { 'fingerprint': fingerprint, 'outputs': _outputs(name) }
+    return name, 'updated', duration, entry
+
+def _read_state():
+    if not os.path.exists(fingerprint_file):
+        return {}
+    with open(fingerprint_file, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def _write_state(state):
+    os.makedirs(third_party_dir, exist_ok=True)
+    temp = fingerprint_file + '.tmp'
+    with open(temp, 'w', encoding='utf-8') as file:
+        file.write(json.dumps(state, indent=2, sort_keys=True))
+    os.replace(temp, fingerprint_file)
+
+def main(): # pylint: disable=missing-function-docstring
+    parser = argparse.ArgumentParser(description='Build metadata files for changed frameworks')
+    parser.add_argument('names', nargs='*', help='targets: ' + ', '.join(targets))
+    parser.add_argument('--force', help='ignore fingerprints', action='store_true')
+    parser.add_argument('--jobs', help='concurrent tools', type=int, default=None)
+    args = parser.parse_args()
+    names = args.names or list(targets)
+    for name in names:
+        if name not in targets:
+            parser.error("unknown target '" + name + "'")
+    state = _read_state()
+    start = time.perf_counter()
+    failed = False
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs or len(names)) as executor:
+        futures = [ executor.submit(_run, name, state, args.force) for name in names ]
+        for future in concurrent.futures.as_completed(futures):
+            name, status, duration, entry = future.result()
+            state[name] = entry
+            failed = failed or status.startswith('failed')
+            print(name.ljust(8) + ' ' + f'{duration:8.1f}' + ' s ' + status)
+    _write_state(state)
+    print('total'.ljust(8) + ' ' + f'{time.perf_counter() - start:8.1f}' + ' s')
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
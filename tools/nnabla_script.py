@@ -5,10 +5,7 @@ import sys
 import os
 import yaml # pylint: disable=import-error
 import mako.template # pylint: disable=import-error
-
-def _write(path, content):
-    with open(path, 'w', encoding='utf-8') as file:
-        file.write(content)
+import files
 
 def _read_yaml(path):
     with open(path, 'r', encoding='utf-8') as file:
@@ -71,7 +68,8 @@ def _metadata():
     function_info = _read_yaml(functions_yaml_path)
     functions = parse_functions(function_info)
     cleanup_functions(functions)
-    _write(os.path.join(root, 'source', 'nnabla-metadata.json'), json.dumps(functions, indent=2))
+    json_file = os.path.join(root, 'source', 'nnabla-metadata.json')
+    files.write(json_file, json.dumps(functions, indent=2))
 
 def _schema():
     root = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
@@ -86,7 +84,7 @@ def _schema():
     template = mako.template.Template(text=None, filename=tmpl_file, preprocessor=None)
     content = template.render(function_info=function_info, solver_info=solver_info)
     content = content.replace('\r\n', '\n').replace('\r', '\n')
-    _write(path, content)
+    files.write(path, content)
 
 def _attribute(name, value): # pylint: disable=too-many-branches
     attribute = {}
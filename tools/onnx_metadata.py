@@ -4,17 +4,19 @@ import collections
 import json
 import os
 import re
+import sys
 import onnx.backend.test.case # pylint: disable=import-error
 import onnx.defs # pylint: disable=import-error
+import files
+
+root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.append(root_dir)
+metadata = __import__('source.metadata').metadata
 
 def _read(path):
     with open(path, 'r', encoding='utf-8') as file:
         return file.read()
 
-def _write(path, content):
-    with open(path, 'w', encoding='utf-8') as file:
-        file.write(content)
-
 categories = {
     'Constant': 'Constant',
     'Conv': 'Layer',
@@ -215,13 +217,43 @@ def _metadata():
         json_root.append(json_schema)
     json_root = sorted(json_root, key=lambda item: item['name'] + ':' + \
         str(item['version'] if 'version' in item else 0).zfill(4))
-    root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
     json_file = os.path.join(root_dir, 'source', 'onnx-metadata.json')
-    content = _read(json_file)
-    items = json.loads(content)
+    items = metadata.Index(json_file).items()
     items = list(filter(lambda item: item['module'] == "com.microsoft", items))
     json_root = json_root + items
-    _write(json_file, json.dumps(json_root, indent=2))
+    files.write(json_file, json.dumps(_compress(json_root), indent=2))
+
+def _compress(json_root):
+    ''' Store the first version of each operator in full and only changed keys after that,
+    with descriptions and example code moved into a shared string table '''
+    strings = {}
+    def intern(value, key=None):
+        if isinstance(value, dict):
+            return { k: intern(v, k) for k, v in value.items() }
+        if isinstance(value, list):
+            return [ intern(_) for _ in value ]
+        if key in ('description', 'code') and isinstance(value, str):
+            return strings.setdefault(value, len(strings))
+        return value
+    types = collections.OrderedDict()
+    for item in json_root:
+        types.setdefault((item['module'], item['name']), []).append(item)
+    json_types = []
+    for (module, name), items in types.items():
+        versions = []
+        previous = {}
+        for item in items:
+            item = intern(item)
+            item.pop('name')
+            item.pop('module')
+            delta = { k: v for k, v in item.items() if k not in previous or previous[k] != v }
+            removed = [ _ for _ in previous if _ not in item ]
+            if removed:
+                delta['-'] = removed
+            versions.append(delta)
+            previous = item
+        json_types.append({ 'name': name, 'module': module, 'versions': versions })
+    return { 'strings': list(strings), 'types': json_types }
 
 def main(): # pylint: disable=missing-function-docstring
     _metadata()
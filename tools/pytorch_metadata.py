@@ -1,10 +1,14 @@
 ''' TorchScript metadata script '''
 
+import argparse
 import collections
+import concurrent.futures
 import json
 import os
 import re
 import sys
+import time
+import files
 
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(root_dir)
@@ -20,21 +24,17 @@ def _read(path):
     with open(path, 'r', encoding='utf-8') as file:
         return file.read()
 
-def _write(path, content):
-    with open(path, 'w', encoding='utf-8') as file:
-        file.write(content)
-
 def _read_metadata():
     metadata: list[dict[str,object]] = json.loads(_read(metadata_file))
     return dict(map(lambda _: ( _['name'], _ ), metadata))
 
-def _write_metadata(value):
+def _format_metadata(value):
     metadata = list(collections.OrderedDict(sorted(value.items())).values())
     content = json.dumps(metadata, indent=2, ensure_ascii=False)
     content = re.sub(r'\s {8}', ' ', content)
     content = re.sub(r',\s {8}', ', ', content)
     content = re.sub(r'\s {6}}', ' }', content)
-    _write(metadata_file, content)
+    return content
 
 schema_source_files = [
     ('aten/src/ATen/native/native_functions.yaml',
@@ -74,31 +74,44 @@ known_schema_definitions = [
     'aten::as_tensor.list(t[] data, *, ScalarType? dtype=None, Device? device=None) -> Tensor'
 ]
 
+def _read_definition(entry):
+    definitions = []
+    content = _read(os.path.join(pytorch_source_dir, entry[0]))
+    for value in entry[1].findall(content):
+        value = re.sub(r'\n|\r|\s*"', '', value) if value.startswith('_caffe2::') else value
+        definitions.append(entry[2] + value if len(entry) > 2 else value)
+    return definitions
+
+def _read_definitions():
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        results = executor.map(_read_definition, schema_source_files)
+        return [ definition for result in results for definition in result ]
+
+def _parse_definition(entry):
+    return [ pytorch.Schema.parse(_) for _ in _read_definition(entry) ]
+
 def _parse_schemas():
     schemas = {}
-    for entry in schema_source_files:
-        path = os.path.join(pytorch_source_dir, entry[0])
-        content = _read(path)
-        for value in entry[1].findall(content):
-            value = re.sub(r'\n|\r|\s*"', '', value) if value.startswith('_caffe2::') else value
-            definition = entry[2] + value if len(entry) > 2 else value
-            schema = pytorch.Schema(definition)
-            if schema.name in schemas:
-                raise KeyError()
-            schemas[schema.name] = schema
+    with concurrent.futures.ProcessPoolExecutor() as executor:
+        results = list(executor.map(_parse_definition, schema_source_files))
+    for schema in [ schema for result in results for schema in result ]:
+        if schema.name in schemas:
+            raise KeyError()
+        schemas[schema.name] = schema
     for definition in known_schema_definitions:
-        schema = pytorch.Schema(definition)
+        schema = pytorch.Schema.parse(definition)
         schemas[schema.name] = schema
     return schemas
 
 def _filter_schemas(schemas, types):
 
+    # Metadata keys are overload names, so index them by operator base name once and
+    # look up each schema's base name instead of testing every prefix.
     keys = set(map(lambda _: _.split('.')[0], types.keys()))
     filtered_schemas = set()
-    for schema in schemas.values():
-        for key in keys:
-            if schema.name == key or schema.name.startswith(key + '.'):
-                filtered_schemas.add(schema.name)
+    for name in schemas:
+        if name.split('.', 1)[0] in keys:
+            filtered_schemas.add(name)
     # filtered_schemas = set(types.keys())
     # content = _read('list.csv')
     # regex = re.compile(r'Unsupported function \'(.*)\' in', re.MULTILINE)
@@ -114,21 +127,28 @@ def _filter_schemas(schemas, types):
     #             filtered_schemas.add(schema.name)
     return dict(filter(lambda _: _[0] in filtered_schemas, schemas.items()))
 
-def _check_schemas(schemas): # pylint: disable=unused-argument
-    # import torch
-    # for name in dir(torch.ops.aten):
-    #     if name.startswith('__') or name == 'name':
-    #         continue
-    #     packet = getattr(torch.ops.aten, name)
-    #     for overload in packet.overloads():
-    #         key = 'aten::' + name + ('.' + overload if overload != 'default' else '')
-    #         overload_schema = str(getattr(packet, overload)._schema)
-    #         if key in schemas:
-    #             schema = schemas[key]
-    #             if overload_schema != str(schema):
-    #                 print(overload_schema)
-    #                 print(schema)
-    pass
+def _check_schemas(schemas):
+    import torch # pylint: disable=import-outside-toplevel,import-error
+    registry = {}
+    for schema in torch._C._jit_get_all_schemas(): # pylint: disable=protected-access
+        key = schema.name + ('.' + schema.overload_name if schema.overload_name else '')
+        registry[key] = _normalize(str(schema))
+    missing = []
+    changed = []
+    for key, schema in schemas.items():
+        if key not in registry:
+            if key.startswith('aten::'):
+                missing.append(key)
+        elif _normalize(str(schema)) != registry[key]:
+            changed.append((key, _normalize(str(schema)), registry[key]))
+    return missing, changed
+
+def _normalize(definition):
+    ''' Definition as printed by the netron schema parser, unchanged if it does not parse '''
+    try:
+        return str(pytorch.Schema.parse(definition))
+    except (SyntaxError, NotImplementedError, IndexError):
+        return definition
 
 def _check_types(types, schemas):
     types = dict(types.items())
@@ -152,15 +172,71 @@ def _metadata():
     types = _read_metadata()
     schemas = _parse_schemas()
     _check_types(types, schemas)
-    _check_schemas(schemas)
     filtered_schemas = _filter_schemas(schemas, types)
     metadata = pytorch.Metadata(types)
     for schema in filtered_schemas.values():
         metadata.type(schema)
-    _write_metadata(types)
+    return types, filtered_schemas
+
+def _check():
+    types, schemas = _metadata()
+    missing, changed = _check_schemas(schemas)
+    for key in missing:
+        print('missing  ' + key)
+    for key, schema, value in changed:
+        print('changed  ' + key + '\n  ' + schema + '\n  ' + value)
+    content = _format_metadata(types)
+    status = 'unchanged' if content == _read(metadata_file) else 'outdated'
+    print(str(len(schemas)) + ' schemas, ' + str(len(missing)) + ' missing, ' + \
+        str(len(changed)) + ' changed, metadata ' + status)
+    return status == 'unchanged' and not missing and not changed
+
+def _benchmark(repeat=5):
+    definitions = _read_definitions() + known_schema_definitions
+    def measure(name, callback):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for definition in definitions:
+                callback(definition)
+        duration = (time.perf_counter() - start) / repeat
+        microseconds = 1000000 * duration / len(definitions)
+        print(name.ljust(8) + ' ' + f'{duration * 1000:.1f}' + ' ms ' + \
+            f'{microseconds:.2f}' + ' us/schema')
+    def tokenize(definition):
+        lexer = pytorch.Schema.Lexer(definition)
+        while lexer.kind != '\0':
+            lexer.next()
+    print(str(len(definitions)) + ' schemas')
+    measure('lexer', tokenize)
+    measure('parse', pytorch.Schema)
+    measure('memo', pytorch.Schema.parse)
+    start = time.perf_counter()
+    schemas = _parse_schemas()
+    types = _read_metadata()
+    keys = set(map(lambda _: _.split('.')[0], types.keys()))
+    def prefix(schemas, _): # previous quadratic filter for comparison
+        return { name for name in schemas for key in keys \
+            if name == key or name.startswith(key + '.') }
+    print('sources'.ljust(8) + ' ' + f'{(time.perf_counter() - start) * 1000:.1f}' + ' ms')
+    for name, callback in [ ('prefix', prefix), ('filter', _filter_schemas) ]:
+        start = time.perf_counter()
+        result = callback(schemas, types)
+        duration = time.perf_counter() - start
+        print(name.ljust(8) + ' ' + f'{duration * 1000:.1f}' + ' ms ' + str(len(result)))
 
 def main(): # pylint: disable=missing-function-docstring
-    _metadata()
+    parser = argparse.ArgumentParser(description='TorchScript metadata script')
+    parser.add_argument('--benchmark', help='measure schema parser', action='store_true')
+    parser.add_argument('--check', help='compare with torch.ops without writing', \
+        action='store_true')
+    args = parser.parse_args()
+    if args.benchmark:
+        _benchmark()
+    elif args.check:
+        sys.exit(0 if _check() else 1)
+    else:
+        types, _ = _metadata()
+        files.write(metadata_file, _format_metadata(types))
 
 if __name__ == '__main__':
     main()
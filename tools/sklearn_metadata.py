@@ -4,6 +4,7 @@ import json
 import os
 import pydoc
 import re
+import files
 
 def _split_docstring(value):
     headers = {}
@@ -116,8 +117,7 @@ def _metadata():
             if 'Parameters' in headers:
                 _update_attributes(schema, headers['Parameters'])
 
-    with open(json_file, 'w', encoding='utf-8') as file:
-        file.write(json.dumps(json_root, sort_keys=False, indent=2))
+    files.write(json_file, json.dumps(json_root, sort_keys=False, indent=2))
 
 def main(): # pylint: disable=missing-function-docstring
     _metadata()
@@ -1,83 +1,65 @@
 ''' TensorFlow Metadata Script '''
 
+import argparse
+import concurrent.futures
+import io
 import json
 import os
+import time
 from google.protobuf import text_format # pylint: disable=import-error,no-name-in-module
 from tensorflow.core.framework import api_def_pb2 # pylint: disable=import-error
 from tensorflow.core.framework import op_def_pb2 # pylint: disable=import-error
 from tensorflow.core.framework import types_pb2 # pylint: disable=import-error
+import files
 
 def _read(path):
     with open(path, 'r', encoding='utf-8') as file:
         return file.read()
 
-def _write(path, content):
-    with open(path, 'w', encoding='utf-8') as file:
-        file.write(content)
-
 def _find_multiline(line, colon):
     if colon == -1:
         return None
-    line = line[colon+1:]
-    while line.startswith(' '):
-        line = line[1:]
+    line = line[colon+1:].lstrip(' ')
     if line.startswith('<<'):
-        line = line[2:]
-        return line
+        return line[2:]
     return None
 
+_str_escape_table = str.maketrans({
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+    '\"': '\\"',
+    '\'': "\\'",
+    '\\': '\\\\'
+})
+
 def _str_escape(text):
-    result = ''
-    for value in text:
-        if value == '\n':
-            result += '\\n'
-        elif value == '\r':
-            result += "\\r"
-        elif value == '\t':
-            result += "\\t"
-        elif value == '\"':
-            result += "\\\""
-        elif value == '\'':
-            result += "\\'"
-        elif value == '\\':
-            result += "\\\\"
-        else:
-            result += value
-    return result
+    return text.translate(_str_escape_table)
 
-def _pbtxt_from_multiline(multiline_pbtxt):
-    pbtxt = ''
-    while len(multiline_pbtxt) > 0:
-        index = multiline_pbtxt.find('\n')
-        if index == -1:
-            pbtxt = pbtxt + multiline_pbtxt
-            multiline_pbtxt = ''
-            break
-        line = multiline_pbtxt[0:index]
-        multiline_pbtxt = multiline_pbtxt[index+1:]
-        colon = line.find(':')
-        end = _find_multiline(line, colon)
+def _pbtxt_lines(lines):
+    lines = iter(lines)
+    for line in lines:
+        content = line[:-1] if line.endswith('\n') else line
+        colon = content.find(':')
+        end = _find_multiline(content, colon)
         if end is None:
-            pbtxt = pbtxt + line + '\n'
+            yield line
             continue
-        pbtxt = pbtxt + line[0:colon+1]
-        unescaped = ''
-        newline = False
-        line = ''
-        while len(multiline_pbtxt) > 0:
-            index = multiline_pbtxt.find('\n')
-            line = multiline_pbtxt[0:index]
-            multiline_pbtxt = multiline_pbtxt[index+1:]
+        yield content[0:colon+1]
+        unescaped = []
+        suffix = ''
+        for line in lines:
+            line = line[:-1] if line.endswith('\n') else line
             if line.startswith(end):
-                line = line[len(end):]
+                suffix = line[len(end):]
                 break
-            if newline:
-                unescaped = unescaped + '\n'
-            newline = True
-            unescaped = unescaped + line
-            line = ''
-        pbtxt = pbtxt + '\"' + _str_escape(unescaped) + '\"' + line + '\n'
-    return pbtxt
+            unescaped.append(line)
+        yield '\"' + _str_escape('\n'.join(unescaped)) + '\"' + suffix + '\n'
+
+def _pbtxt_from_multiline(multiline_pbtxt):
+    if isinstance(multiline_pbtxt, str):
+        multiline_pbtxt = io.StringIO(multiline_pbtxt)
+    return ''.join(_pbtxt_lines(multiline_pbtxt))
 
 def _read_op_list(file):
     op_list = op_def_pb2.OpList()
@@ -85,18 +67,27 @@ def _read_op_list(file):
     text_format.Merge(content, op_list)
     return op_list
 
-def _read_api_def_map(folder):
+def _read_api_defs(filename):
+    api_defs = api_def_pb2.ApiDefs()
+    with open(filename, 'r', encoding='utf-8') as file:
+        text_format.Merge(_pbtxt_from_multiline(file), api_defs)
+    return api_defs.SerializeToString()
+
+def _read_api_def_map(folder, workers=None):
+    filenames = sorted(_ for _ in os.listdir(folder) if _.endswith('.pbtxt'))
+    filenames = [ os.path.join(folder, _) for _ in filenames ]
+    if workers == 1:
+        results = map(_read_api_defs, filenames)
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        with executor:
+            results = list(executor.map(_read_api_defs, filenames, chunksize=16))
     api_def_map = {}
-    for filename in sorted(os.listdir(folder)):
-        if filename.endswith('.pbtxt'):
-            api_defs = api_def_pb2.ApiDefs()
-            filename = folder + '/' + filename
-            with open(filename, 'r', encoding='utf-8') as file:
-                multiline_pbtxt = file.read()
-                pbtxt = _pbtxt_from_multiline(multiline_pbtxt)
-                text_format.Merge(pbtxt, api_defs)
-            for api_def in api_defs.op:
-                api_def_map[api_def.graph_op_name] = api_def
+    for data in results:
+        api_defs = api_def_pb2.ApiDefs()
+        api_defs.ParseFromString(data)
+        for api_def in api_defs.op:
+            api_def_map[api_def.graph_op_name] = api_def
     return api_def_map
 
 def _convert_type(value):
@@ -363,10 +354,13 @@ categories = {
     'VariableV2': 'Control',
 }
 
-def _metadata():
+def _core_dir():
     root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
-    core_dir = os.path.join(root_dir, 'third_party', 'source', 'tensorflow', 'tensorflow', 'core')
-    api_def_map = _read_api_def_map(os.path.join(core_dir, 'api_def' , 'base_api'))
+    return os.path.join(root_dir, 'third_party', 'source', 'tensorflow', 'tensorflow', 'core')
+
+def _metadata(workers=None):
+    core_dir = _core_dir()
+    api_def_map = _read_api_def_map(os.path.join(core_dir, 'api_def' , 'base_api'), workers)
     ops_list = _read_op_list(os.path.join(core_dir, 'ops', 'ops.pbtxt'))
 
     json_root = []
@@ -386,11 +380,41 @@ def _metadata():
         _update_inputs(json_schema, operator, api_def)
         _update_outputs(json_schema, operator, api_def)
         json_root.append(json_schema)
+    return json.dumps(json_root, sort_keys=False, indent=2)
+
+def _benchmark():
+    folder = os.path.join(_core_dir(), 'api_def' , 'base_api')
+    filenames = sorted(_ for _ in os.listdir(folder) if _.endswith('.pbtxt'))
+    start = time.perf_counter()
+    size = 0
+    for filename in filenames:
+        with open(os.path.join(folder, filename), 'r', encoding='utf-8') as file:
+            size += len(_pbtxt_from_multiline(file))
+    duration = time.perf_counter() - start
+    print(str(len(filenames)) + ' files ' + str(size) + ' chars ' + \
+        'preprocess ' + f'{duration * 1000:.1f}' + ' ms')
+    for workers in [ 1, None ]:
+        start = time.perf_counter()
+        content = _metadata(workers)
+        duration = time.perf_counter() - start
+        print(('serial' if workers == 1 else 'parallel').ljust(8) + ' ' + \
+            f'{duration * 1000:.1f}' + ' ms')
+    root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
     json_file = os.path.join(root_dir, 'source', 'tf-metadata.json')
-    _write(json_file, json.dumps(json_root, sort_keys=False, indent=2))
+    print('output ' + ('unchanged' if content == _read(json_file) else 'changed'))
 
 def main(): # pylint: disable=missing-function-docstring
-    _metadata()
+    parser = argparse.ArgumentParser(description='TensorFlow metadata script')
+    parser.add_argument('--benchmark', help='measure and compare with current output', \
+        action='store_true')
+    parser.add_argument('--workers', help='api_def parser processes', type=int, default=None)
+    args = parser.parse_args()
+    if args.benchmark:
+        _benchmark()
+    else:
+        root_dir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+        json_file = os.path.join(root_dir, 'source', 'tf-metadata.json')
+        files.write(json_file, _metadata(args.workers))
 
 if __name__ == '__main__':
     main()